@@ -1,8 +1,13 @@
 import streamlit as st
 
+from rhs.cache import cache_analyses, empreinte_fichier
+from rhs.illustrations import afficher_illustration
+from rhs.instrumentation import afficher_mesures, instrumentation_de_page
+
 st.set_page_config(page_title="Accueil", page_icon="🏠")
+mesures = instrumentation_de_page(st.session_state, "Accueil")
 
-st.image("assets/Donnees_sante.jpg", caption="Illustration de l'analyse CSARR", use_column_width=True)
+afficher_illustration("Donnees_sante.jpg", "Illustration de l'analyse CSARR")
 
 st.title("Analyse des Séjours RHS - CSARR")
 
@@ -27,7 +32,7 @@ Utilisez le **menu latéral** (en haut à gauche) pour accéder aux différentes
 - **Analyse CSARR : Analysez la distribution des actes**
 - **Analyse des séjours par tranche d’âge**  
 - **Regroupement par pathologies (diagnostics)**  
-- **Histogramme des durées selon l’acte principal**  
+- **Histogramme des durées selon l’acte CSARR**  
 - **Détection des séjours longs par tranche d’âge**
 
 ---
@@ -35,11 +40,75 @@ Utilisez le **menu latéral** (en haut à gauche) pour accéder aux différentes
 N'oubliez pas de préparer vos fichiers au bon format pour profiter pleinement de toutes les analyses !
 """)
 
-uploaded_file = st.file_uploader("Importez un fichier RHS")
-if uploaded_file:
-    content = uploaded_file.read().decode("utf-8")  # lire une seule fois
-    st.session_state["rhs_file_text"] = content     # stocker sous forme texte
-
+uploaded_files = st.file_uploader("Importez un ou plusieurs fichiers RHS", accept_multiple_files=True)
+ajouter_historique = st.checkbox(
+    "Ajouter ces fichiers à l'historique multi-mois",
+    help="Les fichiers sont conservés sur le serveur : les prochains mois, il suffira d'importer le nouvel extrait."
+)
+
+# Les modules d'analyse (et pandas) ne sont importés qu'une fois l'accueil et l'import de fichiers affichés :
+# au démarrage du serveur, la page apparaît sans attendre leur chargement
+from rhs.corpus import CorpusRHS, combiner_extraits, preparer_extrait
+from rhs.parsing import lire_fichier_rhs
+
+corpus = CorpusRHS()
+
+if uploaded_files:
+    # Les extraits sont considérés du plus ancien au plus récent selon leur nom de fichier
+    uploaded_files = sorted(uploaded_files, key=lambda f: f.name)
+    empreintes = [empreinte_fichier(f) for f in uploaded_files]
+    cle = ("historique:" if ajouter_historique else "") + "+".join(empreintes)
+
+    if st.session_state.get("rhs_empreinte") != cle:
+        with st.spinner("Analyse du fichier en cours..."), mesures.etape("analyse"):
+            # Analyse unique de chaque fichier, lu par blocs : seules les tables obtenues sont conservées.
+            # Un fichier au contenu identique, déjà analysé dans une autre session, est repris du cache.
+            analyses = [
+                cache_analyses.obtenir(e, lambda f=f: lire_fichier_rhs(f))
+                for f, e in zip(uploaded_files, empreintes)
+            ]
+            if ajouter_historique:
+                for f, e, donnees in zip(uploaded_files, empreintes, analyses):
+                    corpus.ajouter(donnees, e, f.name)
+                donnees_rhs = cache_analyses.obtenir(corpus.signature(), corpus.charger)
+            elif len(analyses) == 1:
+                donnees_rhs = analyses[0]
+            else:
+                donnees_rhs = cache_analyses.obtenir(cle, lambda: combiner_extraits(
+                    [preparer_extrait(donnees, numero) for numero, donnees in enumerate(analyses, start=1)]
+                ))
+            st.session_state["donnees_rhs"] = donnees_rhs
+        # Fichiers d'une version de format inconnue : analysés par expressions régulières, sans positions fixes
+        st.session_state["rhs_versions_non_reconnues"] = [
+            (f.name, donnees.version_non_reconnue)
+            for f, donnees in zip(uploaded_files, analyses) if donnees.version_non_reconnue is not None
+        ]
+        st.session_state["rhs_empreinte"] = cle
+        st.session_state.pop("periode", None)
+
+    for nom_fichier, version in st.session_state.get("rhs_versions_non_reconnues", []):
+        st.warning(
+            f"{nom_fichier} : version de format « {version.strip() or '(vide)'} » non reconnue. "
+            "Le fichier a été analysé par expressions régulières, sans le décodage à positions fixes : "
+            "les types de diagnostic ne sont pas connus et certaines valeurs peuvent manquer."
+        )
     st.success("Fichier chargé avec succès ! Rendez-vous dans une page d'analyse.")
 
-st.info("💡 Astuce : vous pouvez exporter chaque tableau au format Excel/CSV dans les pages d’analyse.")
\ No newline at end of file
+extraits_historique = corpus.extraits()
+if extraits_historique:
+    st.markdown("### Historique multi-mois")
+    st.caption(
+        f"{len(extraits_historique)} extrait(s) conservé(s), du "
+        f"{extraits_historique[0]['date_import'][:10]} au {extraits_historique[-1]['date_import'][:10]}."
+    )
+    if st.button("Analyser tout l'historique"):
+        with st.spinner("Chargement de l'historique en cours..."), mesures.etape("analyse"):
+            signature = corpus.signature()
+            st.session_state["donnees_rhs"] = cache_analyses.obtenir(signature, corpus.charger)
+        st.session_state["rhs_empreinte"] = signature
+        st.session_state.pop("periode", None)
+        st.success("Historique chargé ! Rendez-vous dans une page d'analyse.")
+
+st.info("💡 Astuce : vous pouvez exporter chaque tableau au format Excel/CSV dans les pages d’analyse.")
+
+afficher_mesures(mesures, st.session_state)
@@ -0,0 +1,201 @@
+"""Mesures de performance de l'analyse RHS, comparées à des références enregistrées.
+
+Pour chaque taille de fichier (10 000, 100 000 et 1 000 000 d'enregistrements par
+défaut), un fichier synthétique est généré une fois (``rhs.synthetique``) et
+conservé dans ``benchmarks/donnees/`` ; puis sont mesurés le temps (meilleur de
+``--repetitions`` passages) et le pic de mémoire (``tracemalloc``) de :
+
+- l'analyse du fichier ;
+- les calculs de chacune des pages 1 à 5, à partir des tables analysées ;
+- la production des exports CSV et XLSX.
+
+Les résultats sont comparés à ``benchmarks/references.json`` : la commande échoue
+(code de sortie 1) si une mesure dépasse sa référence de plus de ``--tolerance``,
+ou si elle n'a pas de référence (taille ou étape jamais enregistrée).
+Les références dépendent de la machine ; ``--enregistrer`` les remplace par les
+mesures du jour. Le démarrage de l'application (premier affichage de l'accueil)
+est mesuré à part, par ``python -m benchmarks.demarrage``.
+
+Usage, depuis la racine du dépôt ::
+
+    python -m benchmarks.bench
+    python -m benchmarks.bench --tailles 10000 100000 --enregistrer
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from rhs.cim10 import NIVEAUX, caracteristique_sejour, effectifs, tableau_croise
+from rhs.cube import quantiles_durees, synthese_par_tranche
+from rhs.export import exporter_csv, exporter_xlsx
+from rhs.graphiques import figure_actes_par_jour, figure_histogramme
+from rhs.parsing import lire_fichier_rhs
+from rhs.sejours_longs import METHODES, detecter_sejours_longs
+from rhs.synthetique import ecrire_fichier
+from rhs.tables import TablesDerivees
+from rhs.tranches import DECOUPAGE_STANDARD
+
+DOSSIER = Path(__file__).resolve().parent
+DONNEES = DOSSIER / "donnees"
+REFERENCES = DOSSIER / "references.json"
+TAILLES = (10_000, 100_000, 1_000_000)
+
+# En deçà de ces écarts absolus, une mesure n'est jamais considérée comme une régression
+MARGE_SECONDES = 0.05
+MARGE_MO = 2.0
+
+
+def _analyse(chemin, _donnees):
+    # Un seul processus : les mesures ne dépendent pas du nombre de cœurs de la machine
+    with open(chemin, "rb") as fichier:
+        return lire_fichier_rhs(fichier, processus=1)
+
+
+def _page_1(_chemin, donnees):
+    tables = TablesDerivees(donnees)
+    df_summary = tables.obtenir("actes_par_jour_patient")
+    figure_actes_par_jour(df_summary.groupby("date_acte", as_index=False)["nb_actes"].sum())
+    figure_histogramme(tables.obtenir("total_actes_par_patient")["nb_actes"])
+
+
+def _page_2(_chemin, donnees):
+    tables = TablesDerivees(donnees)
+    tables.obtenir("sejours_tranches", decoupage=DECOUPAGE_STANDARD.nom)
+    cube = tables.obtenir("cube_sejours")
+    synthese_par_tranche(cube, DECOUPAGE_STANDARD)
+    quantiles_durees(cube, "tranche_age", {"duree_mediane": 0.5}, DECOUPAGE_STANDARD)
+
+
+def _page_3(_chemin, donnees):
+    tables = TablesDerivees(donnees)
+    diagnostics = tables.obtenir("diagnostics_sejours")
+    for niveau in NIVEAUX.values():
+        effectifs(diagnostics, niveau)
+    tableau_croise(diagnostics["chapitre"].array,
+                   caracteristique_sejour(diagnostics, tables.obtenir("sejours_ages")["classe_duree"]))
+
+
+def _page_4(_chemin, donnees):
+    TablesDerivees(donnees).obtenir("stats_durees_par_acte")
+
+
+def _page_5(_chemin, donnees):
+    sejours = TablesDerivees(donnees).obtenir("sejours_tranches", decoupage=DECOUPAGE_STANDARD.nom)
+    for methode, description in METHODES.items():
+        detecter_sejours_longs(
+            sejours["duree_sejour_semaines"], sejours["tranche_age"], methode, description.parametre_defaut
+        )
+
+
+def _export_csv(_chemin, donnees):
+    exporter_csv(TablesDerivees(donnees).obtenir("actes_par_jour_patient"))
+
+
+def _export_xlsx(_chemin, donnees):
+    tables = TablesDerivees(donnees)
+    exporter_xlsx({
+        "Actes_par_jour_patient": tables.obtenir("actes_par_jour_patient"),
+        "Total_actes_par_patient": tables.obtenir("total_actes_par_patient"),
+    })
+
+
+ETAPES = {
+    "analyse": _analyse,
+    "page_1_actes": _page_1,
+    "page_2_tranches": _page_2,
+    "page_3_diagnostics": _page_3,
+    "page_4_durees_actes": _page_4,
+    "page_5_sejours_longs": _page_5,
+    "export_csv": _export_csv,
+    "export_xlsx": _export_xlsx,
+}
+
+
+def fichier_synthetique(nb_lignes: int) -> Path:
+    """Fichier de ``nb_lignes`` enregistrements, généré au premier besoin puis réutilisé."""
+    chemin = DONNEES / f"rhs_{nb_lignes}.txt"
+    if not chemin.exists():
+        DONNEES.mkdir(exist_ok=True)
+        print(f"Génération de {chemin.name}...", file=sys.stderr)
+        ecrire_fichier(chemin, nb_lignes)
+    return chemin
+
+
+def mesurer(etape, chemin, donnees, repetitions: int) -> dict:
+    """Meilleur temps sur ``repetitions`` passages, puis pic de mémoire sur un passage supplémentaire."""
+    secondes = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        etape(chemin, donnees)
+        secondes = min(secondes, time.perf_counter() - debut)
+
+    tracemalloc.start()
+    try:
+        etape(chemin, donnees)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"secondes": round(secondes, 3), "memoire_mo": round(pic / 2 ** 20, 1)}
+
+
+def regressions(mesures: dict, references: dict, tolerance: float) -> list:
+    """Mesures dépassant leur référence de plus de ``tolerance`` (et des marges absolues), ou sans référence.
+
+    ``mesures`` et ``references`` sont indexées par taille de fichier, ou par
+    ``"demarrage"`` pour les mesures de ``benchmarks.demarrage`` (sans mémoire).
+    """
+    resultat = []
+    for taille, etapes in mesures.items():
+        for nom, mesure in etapes.items():
+            libelle = f"{taille} lignes" if taille.isdigit() else taille
+            reference = references.get(taille, {}).get(nom)
+            if reference is None:
+                resultat.append(f"{libelle}, {nom} : aucune référence (à enregistrer avec --enregistrer)")
+                continue
+            for cle, marge in (("secondes", MARGE_SECONDES), ("memoire_mo", MARGE_MO)):
+                if cle not in mesure or cle not in reference:
+                    continue
+                if mesure[cle] > reference[cle] * (1 + tolerance) and mesure[cle] - reference[cle] > marge:
+                    resultat.append(f"{libelle}, {nom} : {cle} {mesure[cle]} > référence {reference[cle]}")
+    return resultat
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench", description=__doc__.split("\n")[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES), help="nombres d'enregistrements")
+    parser.add_argument("--etapes", nargs="+", choices=list(ETAPES), default=list(ETAPES))
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="dépassement relatif admis par rapport aux références (0.3 : +30 %%)")
+    parser.add_argument("--enregistrer", action="store_true", help="enregistre les mesures comme nouvelles références")
+    args = parser.parse_args(argv)
+
+    mesures = {}
+    for taille in args.tailles:
+        chemin = fichier_synthetique(taille)
+        donnees = _analyse(chemin, None)
+        mesures[str(taille)] = {}
+        for nom in args.etapes:
+            mesure = mesurer(ETAPES[nom], chemin, donnees, args.repetitions)
+            mesures[str(taille)][nom] = mesure
+            print(f"{taille:>9} lignes  {nom:<22} {mesure['secondes']:>8.3f} s  {mesure['memoire_mo']:>8.1f} Mo")
+
+    references = json.loads(REFERENCES.read_text(encoding="utf-8")) if REFERENCES.exists() else {}
+    if args.enregistrer:
+        for taille, etapes in mesures.items():
+            references.setdefault(taille, {}).update(etapes)
+        REFERENCES.write_text(json.dumps(references, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Références enregistrées dans {REFERENCES.name}.")
+        return 0
+
+    echecs = regressions(mesures, references, args.tolerance)
+    for echec in echecs:
+        print(f"RÉGRESSION : {echec}")
+    return 1 if echecs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Temps de démarrage de l'application : premier affichage de l'accueil après un déploiement.
+
+Chaque passage lance un serveur Streamlit neuf (``streamlit run Home.py``, sans
+navigateur), s'y connecte comme le ferait un navigateur et mesure :
+
+- ``serveur_pret`` : du lancement du serveur à l'ouverture de la connexion ;
+- ``premier_affichage`` : de la demande de la page au premier élément reçu ;
+- ``accueil_complet`` : de la demande de la page à la fin de son exécution ;
+- ``reexecution`` : une seconde exécution de l'accueil dans la même session,
+  ce que coûte chaque interaction une fois les modules chargés.
+
+Les mesures (meilleur temps sur ``--repetitions`` passages) sont comparées aux
+références ``demarrage`` de ``benchmarks/references.json``, comme celles de
+``benchmarks.bench``.
+
+Le client WebSocket (``websockets``) figure dans ``requirements-dev.txt``.
+
+Usage, depuis la racine du dépôt ::
+
+    pip install -r requirements-dev.txt
+    python -m benchmarks.demarrage
+    python -m benchmarks.demarrage --enregistrer
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from benchmarks.bench import REFERENCES, regressions
+
+RACINE = Path(__file__).resolve().parent.parent
+DELAI_MAX_SECONDES = 60
+
+
+def _port_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _executer_page(connexion) -> tuple:
+    """Demande une exécution de l'accueil ; renvoie les délais du premier élément et de la fin."""
+    demande = BackMsg()
+    demande.rerun_script.query_string = ""
+    debut = time.perf_counter()
+    await connexion.send(demande.SerializeToString())
+    premier = None
+    async for contenu in connexion:
+        message = ForwardMsg()
+        message.ParseFromString(contenu)
+        genre = message.WhichOneof("type")
+        if genre == "delta" and premier is None:
+            premier = time.perf_counter() - debut
+        elif genre == "script_finished":
+            return premier, time.perf_counter() - debut
+    raise RuntimeError("Connexion fermée avant la fin de l'exécution de l'accueil.")
+
+
+async def _passage() -> dict:
+    port = _port_libre()
+    debut = time.perf_counter()
+    serveur = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "Home.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=RACINE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                connexion = await websockets.connect(
+                    f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None
+                )
+                break
+            except OSError:
+                if serveur.poll() is not None or time.perf_counter() - debut > DELAI_MAX_SECONDES:
+                    raise RuntimeError("Le serveur Streamlit n'a pas démarré.")
+                await asyncio.sleep(0.02)
+        pret = time.perf_counter() - debut
+        async with connexion:
+            premier, complet = await _executer_page(connexion)
+            _, reexecution = await _executer_page(connexion)
+    finally:
+        serveur.terminate()
+        serveur.wait()
+    return {"serveur_pret": pret, "premier_affichage": premier, "accueil_complet": complet, "reexecution": reexecution}
+
+
+def mesurer(repetitions: int) -> dict:
+    """Meilleur temps de chaque mesure sur ``repetitions`` démarrages."""
+    passages = [asyncio.run(_passage()) for _ in range(repetitions)]
+    return {nom: {"secondes": round(min(p[nom] for p in passages), 3)} for nom in passages[0]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.demarrage", description=__doc__.split("\n")[0])
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="dépassement relatif admis par rapport aux références (0.3 : +30 %%)")
+    parser.add_argument("--enregistrer", action="store_true", help="enregistre les mesures comme nouvelles références")
+    args = parser.parse_args(argv)
+
+    mesures = {"demarrage": mesurer(args.repetitions)}
+    for nom, mesure in mesures["demarrage"].items():
+        print(f"{nom:<22} {mesure['secondes']:>8.3f} s")
+
+    references = json.loads(REFERENCES.read_text(encoding="utf-8")) if REFERENCES.exists() else {}
+    if args.enregistrer:
+        references.setdefault("demarrage", {}).update(mesures["demarrage"])
+        REFERENCES.write_text(json.dumps(references, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Références enregistrées dans {REFERENCES.name}.")
+        return 0
+
+    echecs = regressions(mesures, references, args.tolerance)
+    for echec in echecs:
+        print(f"RÉGRESSION : {echec}")
+    return 1 if echecs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,58 +1,116 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import re
-import io
-
-def telecharger_dataframe(df, nom_fichier_base="export"):
-    # Export en CSV
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-    st.download_button(
-        label="Télécharger en CSV",
-        data=csv_buffer.getvalue(),
-        file_name=f"{nom_fichier_base}.csv",
-        mime="text/csv"
-    )
 
-    # Export en Excel
-    excel_buffer = io.BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Feuille1")
-    st.download_button(
-        label="Télécharger en Excel",
-        data=excel_buffer.getvalue(),
-        file_name=f"{nom_fichier_base}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+from rhs.barre_laterale import choisir_periode
+from rhs.cim10 import NIVEAUX, caracteristique_sejour, effectifs, tableau_croise
+from rhs.cube import croisement_chapitres
+from rhs.illustrations import afficher_illustration
+from rhs.instrumentation import afficher_mesures, instrumentation_de_page
+from rhs.tables import tables_de_session
+from rhs.telechargement import telecharger_dataframe, telecharger_export_global
+from rhs.tranches import DECOUPAGE_STANDARD, DECOUPAGES
 
-st.image("assets/Donnees_sante4.jpg", caption="Analyse des séjours", use_column_width=True)
+mesures = instrumentation_de_page(st.session_state, "Regroupement par pathologies")
+
+afficher_illustration("Donnees_sante4.jpg", "Analyse des séjours")
 
 st.title("Regroupement par pathologies (Diagnostics)")
 
-if "rhs_file_text" not in st.session_state:
+if "donnees_rhs" not in st.session_state:
     st.warning("Veuillez d'abord importer un fichier RHS dans la page d’accueil.")
     st.stop()
 
-lignes = st.session_state["rhs_file_text"].splitlines()
+# Période analysée, commune à toutes les pages
+choisir_periode(st.session_state)
+
+# Même découpage des âges que sur les pages d'analyse par tranche
+noms_decoupages = list(DECOUPAGES)
+nom_decoupage = st.sidebar.selectbox(
+    "Découpage des âges :", noms_decoupages,
+    index=noms_decoupages.index(st.session_state.get("decoupage_age", DECOUPAGE_STANDARD.nom))
+)
+st.session_state["decoupage_age"] = nom_decoupage
+
+# Diagnostics rattachés à leur séjour et classés (chapitre, bloc, catégorie), calculés une fois par fichier
+tables = tables_de_session(st.session_state)
+with mesures.etape("derivation"):
+    df_diag = tables.obtenir("diagnostics_sejours")
+if df_diag.empty:
+    st.error("⚠️ Aucun diagnostic n'a été trouvé dans le fichier RHS.")
+    st.stop()
+
+# Filtres : type de diagnostic et famille de pathologies
+roles_presents = [r for r in df_diag["role"].cat.categories if r in set(df_diag["role"].unique())]
+roles_choisis = st.multiselect("Types de diagnostic :", roles_presents, default=roles_presents)
 
-def extraire_diagnostics(ligne):
-    return re.findall(r'[A-Z]\d{2}\.?\d*', ligne)
+chapitres_presents = df_diag["chapitre"].dropna().unique().sort_values().tolist()
+famille = st.selectbox("Famille de pathologies (chapitre CIM-10) :", ["Toutes"] + chapitres_presents)
 
-# Extraction des diagnostics par ligne
-diagnostics = []
-for ligne in lignes:
-    diags = extraire_diagnostics(ligne)
-    diagnostics.extend(diags)
+with mesures.etape("agregation"):
+    masque = df_diag["role"].isin(roles_choisis)
+    if famille != "Toutes":
+        masque &= df_diag["chapitre"] == famille
+    df_selection = df_diag[masque]
 
-df_diag = pd.DataFrame(diagnostics, columns=["diagnostic"])
-top_diag = df_diag["diagnostic"].value_counts().head(20).reset_index()
-top_diag.columns = ["diagnostic", "fréquence"]
+libelle_niveau = st.selectbox("Regrouper par :", list(NIVEAUX))
+niveau = NIVEAUX[libelle_niveau]
+nb_affiches = st.slider("Nombre de regroupements affichés :", min_value=5, max_value=50, value=20)
 
-st.subheader("Top 20 des diagnostics les plus fréquents")
-fig = px.bar(top_diag, x="diagnostic", y="fréquence", color="fréquence", height=500)
-st.plotly_chart(fig, use_container_width=True)
+with mesures.etape("agregation"):
+    df_effectifs = effectifs(df_selection, niveau)
+top_diag = df_effectifs.head(nb_affiches)
+
+st.subheader(f"Top {nb_affiches} des diagnostics les plus fréquents ({libelle_niveau.lower()})")
+with mesures.etape("rendu"):
+    fig = px.bar(
+        top_diag, x=niveau, y="fréquence", color="fréquence", hover_data=["nb_sejours"], height=500,
+        labels={niveau: libelle_niveau, "nb_sejours": "Nombre de séjours"}
+    )
+    st.plotly_chart(fig, width="stretch")
+    st.dataframe(df_effectifs, width="stretch")
 
 # Ajout des boutons d'export
 st.markdown("### Exporter les résultats")
-telecharger_dataframe(top_diag, nom_fichier_base="top_20_diagnostics")
+telecharger_dataframe(df_effectifs, nom_fichier_base=f"diagnostics_par_{niveau}")
+
+# Croisement avec les caractéristiques du séjour
+st.subheader("Croisement avec l'âge et la durée de séjour")
+croisement = st.radio("Croiser avec :", ["Tranche d'âge", "Durée de séjour"], horizontal=True)
+colonne_croisement = "tranche_age" if croisement == "Tranche d'âge" else "classe_duree"
+if niveau == "chapitre":
+    # Au niveau des chapitres, le croisement est lu dans le cube des diagnostics, sans reparcourir le détail
+    with mesures.etape("derivation"):
+        cube = tables.obtenir("cube_diagnostics")
+    with mesures.etape("agregation"):
+        df_croise = croisement_chapitres(
+            cube, colonne_croisement, roles_choisis, None if famille == "Toutes" else famille,
+            DECOUPAGES[nom_decoupage]
+        )
+else:
+    with mesures.etape("derivation"):
+        if colonne_croisement == "tranche_age":
+            serie_sejours = tables.obtenir("sejours_tranches", decoupage=nom_decoupage)["tranche_age"]
+        else:
+            serie_sejours = tables.obtenir("sejours_ages")["classe_duree"]
+    with mesures.etape("agregation"):
+        df_croise = tableau_croise(df_selection[niveau].array, caracteristique_sejour(df_selection, serie_sejours))
+with mesures.etape("agregation"):
+    # Les regroupements les plus fréquents d'abord, comme dans le graphique ci-dessus
+    df_croise = df_croise.loc[[v for v in top_diag[niveau] if v in df_croise.index]]
+
+with mesures.etape("rendu"):
+    fig_croise = px.imshow(
+        df_croise, text_auto=True, aspect="auto", color_continuous_scale="Blues",
+        labels={"x": croisement, "y": libelle_niveau, "color": "Diagnostics"},
+        height=max(400, 25 * len(df_croise))
+    )
+    st.plotly_chart(fig_croise, width="stretch")
+
+st.markdown("### Export global du regroupement par pathologies")
+dfs_export = {
+    f"Diagnostics_par_{niveau}": df_effectifs,
+    "Croisement": df_croise.rename_axis(libelle_niveau).reset_index(),
+}
+telecharger_export_global(dfs_export, nom_fichier="export_global_diagnostics.xlsx")
+
+afficher_mesures(mesures, st.session_state)
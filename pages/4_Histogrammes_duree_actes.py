@@ -1,74 +1,71 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import re
-import io
 
-def telecharger_dataframe(df, nom_fichier_base="export"):
-    # Export en CSV
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-    st.download_button(
-        label="Télécharger en CSV",
-        data=csv_buffer.getvalue(),
-        file_name=f"{nom_fichier_base}.csv",
-        mime="text/csv"
-    )
+from rhs.barre_laterale import choisir_periode
+from rhs.graphiques import SEUIL_POINTS, figure_boite, figure_histogramme
+from rhs.illustrations import afficher_illustration
+from rhs.instrumentation import afficher_mesures, instrumentation_de_page
+from rhs.tables import tables_de_session
+from rhs.telechargement import telecharger_dataframe
 
-    # Export en Excel
-    excel_buffer = io.BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Feuille1")
-    st.download_button(
-        label="Télécharger en Excel",
-        data=excel_buffer.getvalue(),
-        file_name=f"{nom_fichier_base}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+mesures = instrumentation_de_page(st.session_state, "Histogrammes des durées par acte")
 
-st.image("assets/Donnees_sante5.jpg", caption="Analyse des séjours", use_column_width=True)
+afficher_illustration("Donnees_sante5.jpg", "Analyse des séjours")
 
-st.title("Histogramme des durées selon l’acte principal (CSARR)")
+st.title("Histogramme des durées selon l’acte CSARR")
 
-if "rhs_file_text" not in st.session_state:
+if "donnees_rhs" not in st.session_state:
     st.warning("Veuillez d'abord importer un fichier RHS dans la page d’accueil.")
     st.stop()
 
-lignes = st.session_state["rhs_file_text"].splitlines()
-
-def extraire_dates(ligne):
-    match = re.search(r'(\d{8})(\d{8}| {8})(\d{8})', ligne)
-    if match:
-        entree = match.group(1)
-        sortie = match.group(2).strip() or None
-        return entree, sortie
-    return None, None
-
-def extraire_acte_principal(ligne):
-    actes = re.findall(r'[A-Z]{3}(?:\+\d{3}|\d{3})', ligne)
-    return actes[0] if actes else None
+# Période analysée, commune à toutes les pages
+choisir_periode(st.session_state)
 
-donnees = []
-for ligne in lignes:
-    entree, sortie = extraire_dates(ligne)
-    acte = extraire_acte_principal(ligne)
-    if entree and sortie and acte:
-        donnees.append([entree, sortie, acte])
+# Séjours terminés × actes CSARR réalisés pendant le séjour, et statistiques de durée par acte,
+# calculés une fois par fichier
+tables = tables_de_session(st.session_state)
+with mesures.etape("derivation"):
+    df = tables.obtenir("durees_par_acte")
+    stats = tables.obtenir("stats_durees_par_acte")
+if stats.empty:
+    st.error("⚠️ Aucun séjour terminé comportant des actes CSARR n'a été trouvé.")
+    st.stop()
 
-df = pd.DataFrame(donnees, columns=["entree", "sortie", "acte"])
-df["entree"] = pd.to_datetime(df["entree"], format="%d%m%Y", errors="coerce")
-df["sortie"] = pd.to_datetime(df["sortie"], format="%d%m%Y", errors="coerce")
-df["duree"] = (df["sortie"] - df["entree"]).dt.days / 7
+acte_choisi = st.selectbox("Choisissez un acte CSARR :", sorted(stats.index))
 
-actes_uniques = df["acte"].dropna().unique().tolist()
-acte_choisi = st.selectbox("Choisissez un acte principal :", sorted(actes_uniques))
+# Les séjours de l'acte occupent des lignes contiguës : aucune recherche dans la table entière
+stats_acte = stats.loc[acte_choisi]
+df_filtré = df.iloc[stats.at[acte_choisi, "debut"]:stats.at[acte_choisi, "fin"]]
 
-df_filtré = df[df["acte"] == acte_choisi]
+colonnes = st.columns(4)
+colonnes[0].metric("Séjours", int(stats_acte["nb_sejours"]))
+colonnes[1].metric("Actes réalisés", int(stats_acte["nb_actes"]))
+colonnes[2].metric("Durée moyenne (semaines)", stats_acte["duree_moyenne"])
+colonnes[3].metric("Durée médiane (semaines)", stats_acte["mediane"])
 
+# Histogramme et boîte calculés côté serveur : seuls les effectifs et les quartiles sont envoyés au navigateur
 st.subheader(f"Histogramme des durées pour l’acte {acte_choisi}")
-fig = px.box(df_filtré, y="duree", labels={"duree": "Durée de séjour (semaines)"}, points="all")
-st.plotly_chart(fig, use_container_width=True)
+colonne_histogramme, colonne_boite = st.columns([2, 1])
+with mesures.etape("rendu"):
+    colonne_histogramme.plotly_chart(figure_histogramme(
+        df_filtré["duree"], libelle_x="Durée de séjour (semaines)", libelle_y="Nombre de séjours"
+    ), width="stretch")
+    colonne_boite.plotly_chart(
+        figure_boite(df_filtré["duree"], "Durée de séjour (semaines)"), width="stretch"
+    )
+if len(df_filtré) > SEUIL_POINTS:
+    st.caption(f"Plus de {SEUIL_POINTS} séjours : seuls les quartiles et les moustaches sont affichés, sans les points.")
 
 # Export des données filtrées
 st.markdown("### Exporter les données de cette sélection")
-telecharger_dataframe(df_filtré, nom_fichier_base=f"histogramme_acte_{acte_choisi}")
+telecharger_dataframe(
+    df_filtré[["identifiant", "entree", "sortie", "acte", "nb_actes", "duree"]],
+    nom_fichier_base=f"histogramme_acte_{acte_choisi}"
+)
+
+st.subheader("Durées de séjour pour l’ensemble des actes")
+df_stats = stats.drop(columns=["debut", "fin"]).rename_axis("acte").reset_index()
+st.dataframe(df_stats, width="stretch")
+st.markdown("### Exporter les statistiques par acte")
+telecharger_dataframe(df_stats, nom_fichier_base="durees_par_acte")
+
+afficher_mesures(mesures, st.session_state)
@@ -1,63 +1,99 @@
 import streamlit as st
-import pandas as pd
-import io
-
-def telecharger_dataframe(df, nom_fichier_base="export"):
-    # Export en CSV
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-    st.download_button(
-        label="Télécharger en CSV",
-        data=csv_buffer.getvalue(),
-        file_name=f"{nom_fichier_base}.csv",
-        mime="text/csv"
-    )
-
-    # Export en Excel
-    excel_buffer = io.BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Feuille1")
-    st.download_button(
-        label="Télécharger en Excel",
-        data=excel_buffer.getvalue(),
-        file_name=f"{nom_fichier_base}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-
-st.image("assets/Donnees_sante6.jpg", caption="Analyse des séjours", use_column_width=True)
+
+from rhs.barre_laterale import choisir_periode
+from rhs.illustrations import afficher_illustration
+from rhs.instrumentation import afficher_mesures, instrumentation_de_page
+from rhs.pagination import paginer
+from rhs.sejours import preparer_affichage, rechercher_sejours
+from rhs.sejours_longs import METHODES, detecter_sejours_longs
+from rhs.tables import tables_de_session
+from rhs.telechargement import telecharger_dataframe
+from rhs.tranches import DECOUPAGE_STANDARD, DECOUPAGES
+
+mesures = instrumentation_de_page(st.session_state, "Séjours longs par tranche")
+
+afficher_illustration("Donnees_sante6.jpg", "Analyse des séjours")
 
 st.title("Détection des séjours longs par tranche d’âge")
 
-if "df_dates" not in st.session_state:
-    st.warning("Les données ne sont pas encore prêtes. Merci de revenir après l'import.")
+if "donnees_rhs" not in st.session_state:
+    st.warning("Veuillez d'abord importer un fichier RHS dans la page d’accueil.")
     st.stop()
 
-df_dates = st.session_state["df_dates"]
-
+# Période analysée, commune à toutes les pages
+choisir_periode(st.session_state)
 
+# Même découpage des âges que sur la page d'analyse par tranche
+noms_decoupages = list(DECOUPAGES)
+nom_decoupage = st.sidebar.selectbox(
+    "Découpage des âges :", noms_decoupages,
+    index=noms_decoupages.index(st.session_state.get("decoupage_age", DECOUPAGE_STANDARD.nom))
+)
+st.session_state["decoupage_age"] = nom_decoupage
+decoupage = DECOUPAGES[nom_decoupage]
+tables = tables_de_session(st.session_state)
+with mesures.etape("derivation"):
+    df_dates = tables.obtenir("sejours_tranches", decoupage=nom_decoupage)
+if df_dates.empty:
+    st.warning("Aucun séjour ne correspond à la période sélectionnée.")
+    st.stop()
 
-# Seuil par tranche : moyenne + 50%
-seuils = df_dates.groupby("tranche_age")["duree_sejour_semaines"].mean() * 1.5
+# Méthode de détection, et son paramètre
+noms_methodes = list(METHODES)
+methode = st.selectbox(
+    "Méthode de détection :", noms_methodes, format_func=lambda nom: METHODES[nom].libelle
+)
+description = METHODES[methode]
+parametre = st.slider(
+    description.libelle_parametre, min_value=description.parametre_min, max_value=description.parametre_max,
+    value=description.parametre_defaut, key=f"parametre_{methode}"
+)
+st.caption(description.description)
 
-df_dates["sejour_long"] = df_dates.apply(
-    lambda row: row["duree_sejour_semaines"] > seuils.get(row["tranche_age"], float('inf')), axis=1
+# Le tableau partagé n'est jamais modifié : les indicateurs sont des séries propres à la page,
+# mémorisés par période, découpage, méthode et paramètre (les plus anciens sont oubliés au-delà de 8)
+cle_detection = (
+    st.session_state.get("rhs_empreinte"), st.session_state.get("periode"), nom_decoupage, methode, parametre
 )
+detections = st.session_state.setdefault("sejours_longs", {})
+if cle_detection not in detections:
+    if len(detections) >= 8:
+        detections.pop(next(iter(detections)))
+    with mesures.etape("agregation"):
+        detections[cle_detection] = detecter_sejours_longs(
+            df_dates["duree_sejour_semaines"], df_dates["tranche_age"], methode, parametre
+        )
+sejour_long = detections[cle_detection]
 
-tranches = df_dates["tranche_age"].dropna().unique().tolist()
-tranche_choisie = st.selectbox("Choisissez une tranche d’âge :", sorted(tranches))
+tranches = [t for t in decoupage.ordre if t in df_dates["tranche_age"].unique()]
+tranche_choisie = st.selectbox("Choisissez une tranche d’âge :", tranches)
 
-df_filtré = df_dates[(df_dates["tranche_age"] == tranche_choisie) & (df_dates["sejour_long"] == True)]
+liens_actes = tables.obtenir("actes_par_sejour")
+COLONNES = ["identifiant", "date_entree", "date_sortie", "duree_sejour_semaines", "actes_csarr"]
+with mesures.etape("agregation"):
+    df_filtré = df_dates[(df_dates["tranche_age"] == tranche_choisie) & sejour_long]
+st.metric("Séjours longs dans la tranche", len(df_filtré))
 
+# Recherche, tri et pagination côté serveur : seule la page affichée est mise en forme
 st.subheader(f"Patients avec séjours longs dans la tranche {tranche_choisie}")
-st.dataframe(df_filtré[[
-    "identifiant", "date_entree", "date_sortie", "duree_sejour_semaines", "actes_csarr"
-]], use_container_width=True)
+df_filtré, df_page = paginer(
+    df_filtré, "sejours_longs",
+    {
+        "Durée (semaines)": "duree_sejour_semaines", "Ordre du fichier": None,
+        "Identifiant patient": "identifiant", "Date d'entrée": "date_entree",
+    },
+    rechercher=lambda df, texte: rechercher_sejours(df, liens_actes, texte),
+    libelle_recherche="Rechercher un patient ou un acte CSARR :",
+)
+with mesures.etape("rendu"):
+    st.dataframe(preparer_affichage(df_page, liens_actes)[COLONNES], width="stretch")
 
 # Boutons d'export
 st.markdown("### Exporter les résultats affichés")
 telecharger_dataframe(
-    df_filtré[[
-        "identifiant", "date_entree", "date_sortie", "duree_sejour_semaines", "actes_csarr"
-    ]],
-    nom_fichier_base=f"sejours_longs_{tranche_choisie.replace(' ', '_')}"
+    df_filtré,
+    nom_fichier_base=f"sejours_longs_{tranche_choisie.replace(' ', '_')}",
+    preparer=lambda df: preparer_affichage(df, liens_actes)[COLONNES]
 )
+
+afficher_mesures(mesures, st.session_state)
@@ -0,0 +1 @@
+"""Traitements partagés par les pages d'analyse des fichiers RHS."""
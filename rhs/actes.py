@@ -0,0 +1,77 @@
+"""Actes CSARR rattachés à leur séjour et statistiques de durée par acte.
+
+Chaque acte est rattaché à son séjour par ``id_sejour`` (voir
+``rhs.parsing.DonneesRHS``), quelle que soit la semaine du séjour qui le porte.
+La table obtenue compte une ligne par séjour et par code d'acte ; les
+statistiques de durée de chaque code sont calculées en une seule passe groupée.
+"""
+import numpy as np
+import pandas as pd
+
+from rhs.sejours import positions_sejours
+
+QUANTILES = {"q1": 0.25, "mediane": 0.5, "q3": 0.75}
+
+
+def table_sejours_actes(sejours: pd.DataFrame, actes: pd.DataFrame) -> pd.DataFrame:
+    """Une ligne par séjour et par code d'acte réalisé pendant ce séjour.
+
+    Colonnes : ``sejour`` (position dans ``sejours``), ``identifiant``, ``entree``,
+    ``sortie``, ``acte`` (catégoriel), ``nb_actes`` (occurrences de l'acte dans le
+    séjour) et ``duree`` (semaines, manquante pour une hospitalisation en cours).
+    """
+    positions = positions_sejours(sejours, actes["id_sejour"])
+    codes, valeurs = pd.factorize(actes["code_csarr"])
+    rattaches = (positions >= 0) & (codes >= 0)
+
+    # Couples (séjour, acte) distincts et leur nombre d'occurrences, par tri des clés combinées
+    cles = np.sort(positions[rattaches].astype(np.int64) * len(valeurs) + codes[rattaches])
+    debuts = np.flatnonzero(np.r_[True, cles[1:] != cles[:-1]]) if len(cles) else np.array([], dtype=np.int64)
+    nb_actes = np.diff(np.r_[debuts, len(cles)])
+    cles = cles[debuts]
+    sejour = cles // max(len(valeurs), 1)
+
+    entree = sejours["date_entree"].to_numpy()[sejour]
+    sortie = sejours["date_sortie"].to_numpy()[sejour]
+    return pd.DataFrame({
+        "sejour": sejour,
+        "identifiant": sejours["identifiant"].to_numpy()[sejour],
+        "entree": entree,
+        "sortie": sortie,
+        "acte": pd.Categorical.from_codes(cles % max(len(valeurs), 1), categories=valeurs),
+        "nb_actes": nb_actes,
+        "duree": (sortie - entree) / np.timedelta64(7, "D"),
+    })
+
+
+def durees_par_acte(sejours_actes: pd.DataFrame) -> pd.DataFrame:
+    """Séjours terminés de ``sejours_actes``, triés par acte : chaque acte occupe une tranche contiguë."""
+    termines = sejours_actes.dropna(subset=["duree"])
+    return termines.sort_values("acte", kind="stable").reset_index(drop=True)
+
+
+def stats_durees_par_acte(durees: pd.DataFrame) -> pd.DataFrame:
+    """Nombre de séjours et d'actes, durée moyenne et quantiles (semaines) de chaque acte.
+
+    ``durees`` est la table renvoyée par ``durees_par_acte`` ; ``debut`` et ``fin``
+    délimitent les lignes de chaque acte, pour y accéder sans filtrer la table.
+    """
+    groupes = durees.groupby("acte", observed=True, sort=True)
+    stats = groupes.agg(
+        nb_sejours=("duree", "size"),
+        nb_actes=("nb_actes", "sum"),
+        duree_moyenne=("duree", "mean"),
+        duree_min=("duree", "min"),
+        duree_max=("duree", "max"),
+    )
+    quantiles = groupes["duree"].quantile(list(QUANTILES.values())).unstack()
+    quantiles = quantiles.reindex(columns=list(QUANTILES.values()))
+    quantiles.columns = list(QUANTILES)
+    stats = stats.join(quantiles)[
+        ["nb_sejours", "nb_actes", "duree_moyenne", "duree_min", "q1", "mediane", "q3", "duree_max"]
+    ].round(2)
+
+    stats["fin"] = stats["nb_sejours"].cumsum()
+    stats["debut"] = stats["fin"] - stats["nb_sejours"]
+    stats.index = stats.index.astype(str)
+    return stats
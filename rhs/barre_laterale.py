@@ -0,0 +1,30 @@
+"""Réglages de la barre latérale communs à toutes les pages d'analyse.
+
+Les widgets d'une page disparaissent de la session quand on en change : leur
+valeur est donc recopiée sous une clé propre (``periode``) et restaurée à
+l'affichage de chaque page.
+"""
+import streamlit as st
+
+from rhs.periode import index_dates
+
+
+def choisir_periode(etat):
+    """Sélecteur de la période analysée ; ``etat["periode"]`` vaut ``None`` pour toute la période des données."""
+    bornes = index_dates(etat).bornes()
+    if bornes is None:
+        return
+    premier, dernier = bornes
+    if "periode:selection" not in etat:
+        debut, fin = etat.get("periode") or bornes
+        etat["periode:selection"] = (max(debut, premier), min(fin, dernier))
+
+    selection = st.sidebar.date_input(
+        "Période analysée :", min_value=premier, max_value=dernier, key="periode:selection",
+        help="Toutes les pages sont calculées sur les séjours et les actes de cette période.",
+    )
+    # Pendant la saisie, une seule date est choisie : la période précédente est conservée
+    if len(selection) == 2:
+        etat["periode"] = None if tuple(selection) == bornes else tuple(selection)
+    if etat.get("periode") is not None:
+        st.sidebar.caption(f"Données restreintes du {etat['periode'][0]:%d/%m/%Y} au {etat['periode'][1]:%d/%m/%Y}.")
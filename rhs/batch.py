@@ -0,0 +1,151 @@
+"""Mode batch : produit les analyses des pages 1 à 5 sans interface Streamlit.
+
+Usage ::
+
+    python -m rhs.batch EXTRAIT.TXT [EXTRAIT.TXT ...] --sortie resultats/ --format parquet xlsx --processus 4
+
+Chaque fichier est analysé indépendamment, dans un processus distinct quand
+``--processus`` est supérieur à 1 (un fichier seul est alors découpé en blocs
+analysés en parallèle) ; ses résultats sont écrits dans
+``<sortie>/<nom du fichier>/<analyse>.parquet`` et/ou ``<sortie>/<nom du fichier>.xlsx``
+(une feuille par analyse). Les tableaux sont ceux des pages du tableau de bord,
+calculés par les mêmes fonctions (``rhs.tables``).
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from rhs.cim10 import NIVEAUX, caracteristique_sejour, effectifs, tableau_croise
+from rhs.cube import synthese_par_tranche
+from rhs.export import exporter_xlsx
+from rhs.parsing import DonneesRHS, lire_fichier_rhs
+from rhs.sejours import preparer_affichage
+from rhs.sejours_longs import METHODES, detecter_sejours_longs
+from rhs.tables import TablesDerivees
+from rhs.tranches import DECOUPAGE_STANDARD, DECOUPAGES
+
+FORMATS = ("parquet", "xlsx")
+COLONNES_SEJOURS = [
+    "identifiant", "date_entree", "date_sortie", "date_naissance", "age_entree", "tranche_age",
+    "duree_sejour_semaines", "actes_csarr",
+]
+
+
+def analyses_completes(donnees: DonneesRHS, nom_decoupage=DECOUPAGE_STANDARD.nom,
+                       methode="moyenne", parametre=None) -> dict:
+    """Tableaux de résultats de toutes les pages, par nom d'analyse."""
+    tables = TablesDerivees(donnees)
+    if parametre is None:
+        parametre = METHODES[methode].parametre_defaut
+    resultats = {}
+
+    # Page 1 : actes CSARR par jour et par patient
+    resultats["actes_par_jour_patient"] = tables.obtenir("actes_par_jour_patient")
+    total_par_patient = tables.obtenir("total_actes_par_patient")
+    resultats["patients_un_seul_acte"] = total_par_patient[total_par_patient["nb_actes"] == 1]
+    resultats["total_actes_par_patient"] = total_par_patient
+
+    # Page 2 : séjours par tranche d'âge
+    sejours = tables.obtenir("sejours_tranches", decoupage=nom_decoupage)
+    resultats["synthese_par_tranche"] = synthese_par_tranche(tables.obtenir("cube_sejours"), DECOUPAGES[nom_decoupage])
+    liens = tables.obtenir("actes_par_sejour")
+    resultats["sejours_par_tranche"] = preparer_affichage(sejours, liens)[COLONNES_SEJOURS]
+
+    # Page 3 : diagnostics regroupés, et croisés avec l'âge et la durée de séjour
+    diagnostics = tables.obtenir("diagnostics_sejours")
+    for niveau in NIVEAUX.values():
+        resultats[f"diagnostics_par_{niveau}"] = effectifs(diagnostics, niveau)
+    chapitres = diagnostics["chapitre"].array
+    for nom, serie in (("tranche", sejours["tranche_age"]), ("duree", tables.obtenir("sejours_ages")["classe_duree"])):
+        croise = tableau_croise(chapitres, caracteristique_sejour(diagnostics, serie))
+        croise.columns = croise.columns.astype(str)
+        resultats[f"chapitres_par_{nom}"] = croise.rename_axis("chapitre").reset_index()
+
+    # Page 4 : durées de séjour par acte CSARR
+    resultats["durees_par_acte"] = (
+        tables.obtenir("stats_durees_par_acte").drop(columns=["debut", "fin"]).rename_axis("acte").reset_index()
+    )
+
+    # Page 5 : séjours longs de chaque tranche d'âge
+    sejour_long = detecter_sejours_longs(sejours["duree_sejour_semaines"], sejours["tranche_age"], methode, parametre)
+    resultats["sejours_longs"] = preparer_affichage(sejours[sejour_long], liens)[COLONNES_SEJOURS]
+
+    return {nom: df.reset_index(drop=True) for nom, df in resultats.items()}
+
+
+def traiter_fichier(chemin, sortie, formats=FORMATS, nom_decoupage=DECOUPAGE_STANDARD.nom,
+                    methode="moyenne", parametre=None, processus_analyse=1) -> dict:
+    """Analyse un extrait RHS et écrit ses résultats sous ``sortie`` ; renvoie un résumé du traitement."""
+    debut = time.perf_counter()
+    chemin, sortie = Path(chemin), Path(sortie)
+    with open(chemin, "rb") as fichier:
+        donnees = lire_fichier_rhs(fichier, processus=processus_analyse)
+    resultats = analyses_completes(donnees, nom_decoupage, methode, parametre)
+
+    sortie.mkdir(parents=True, exist_ok=True)
+    if "parquet" in formats:
+        dossier = sortie / chemin.stem
+        dossier.mkdir(exist_ok=True)
+        for nom, df in resultats.items():
+            df.to_parquet(dossier / f"{nom}.parquet", index=False)
+    if "xlsx" in formats:
+        (sortie / f"{chemin.stem}.xlsx").write_bytes(exporter_xlsx(resultats))
+
+    return {
+        "fichier": str(chemin),
+        "nb_sejours": len(donnees.sejours),
+        "nb_actes": len(donnees.actes),
+        "duree_s": round(time.perf_counter() - debut, 2),
+    }
+
+
+def _traiter(arguments):
+    chemin, options = arguments
+    try:
+        return traiter_fichier(chemin, **options)
+    except Exception as erreur:  # un fichier en erreur ne doit pas interrompre les autres
+        return {"fichier": str(chemin), "erreur": f"{type(erreur).__name__}: {erreur}"}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m rhs.batch", description="Analyse des fichiers RHS sans interface, résultats en Parquet/XLSX."
+    )
+    parser.add_argument("fichiers", nargs="+", type=Path, help="extraits RHS (.TXT) à analyser")
+    parser.add_argument("-o", "--sortie", type=Path, default=Path("resultats"), help="dossier des résultats")
+    parser.add_argument("-f", "--format", nargs="+", choices=FORMATS, default=list(FORMATS), dest="formats",
+                        help="formats de sortie (par défaut : les deux)")
+    parser.add_argument("-p", "--processus", type=int, default=1,
+                        help="nombre de processus (par défaut : 1)")
+    parser.add_argument("--decoupage", choices=list(DECOUPAGES), default=DECOUPAGE_STANDARD.nom,
+                        help="découpage des âges")
+    parser.add_argument("--methode", choices=list(METHODES), default="moyenne",
+                        help="méthode de détection des séjours longs")
+    parser.add_argument("--parametre", type=float, default=None,
+                        help="paramètre de la méthode (par défaut : celui de la page des séjours longs)")
+    args = parser.parse_args(argv)
+
+    options = {
+        "sortie": args.sortie, "formats": args.formats, "nom_decoupage": args.decoupage,
+        "methode": args.methode, "parametre": args.parametre,
+    }
+    # Plusieurs fichiers : un processus par fichier ; un seul fichier : ses blocs sont répartis entre les processus
+    en_parallele = args.processus > 1 and len(args.fichiers) > 1
+    options["processus_analyse"] = 1 if en_parallele else args.processus
+    taches = [(chemin, options) for chemin in args.fichiers]
+    if en_parallele:
+        with ProcessPoolExecutor(max_workers=args.processus) as pool:
+            resumes = list(pool.map(_traiter, taches))
+    else:
+        resumes = [_traiter(tache) for tache in taches]
+
+    print(pd.DataFrame(resumes).convert_dtypes().to_string(index=False))
+    return 1 if any("erreur" in r for r in resumes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
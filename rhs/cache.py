@@ -0,0 +1,84 @@
+"""Cache des fichiers RHS analysés, partagé entre les sessions du serveur.
+
+Les entrées sont indexées par l'empreinte SHA-256 du contenu importé : un même
+extrait ouvert par plusieurs analystes, ou réimporté, n'est analysé qu'une fois.
+La mémoire occupée est plafonnée ; au-delà, les entrées les moins récemment
+utilisées sont évincées.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+TAILLE_MAX_DEFAUT_MO = int(os.environ.get("RHS_CACHE_TAILLE_MO", "1024"))
+
+
+def empreinte(contenu: bytes) -> str:
+    return hashlib.sha256(contenu).hexdigest()
+
+
+def empreinte_fichier(fichier, taille_bloc=8 * 1024 * 1024) -> str:
+    """Empreinte d'un fichier ouvert en binaire, lu par blocs puis rembobiné."""
+    sha = hashlib.sha256()
+    fichier.seek(0)
+    for bloc in iter(lambda: fichier.read(taille_bloc), b""):
+        sha.update(bloc)
+    fichier.seek(0)
+    return sha.hexdigest()
+
+
+class CacheLRU:
+    """Cache LRU borné par la taille mémoire (en octets) des valeurs stockées.
+
+    La taille d'une valeur est donnée par ``mesurer(valeur)`` ; par défaut, sa
+    méthode ``taille_octets()``.
+    """
+
+    def __init__(self, taille_max_octets: int, mesurer=lambda valeur: valeur.taille_octets()):
+        self.taille_max_octets = taille_max_octets
+        self.mesurer = mesurer
+        self._entrees = OrderedDict()
+        self._tailles = {}
+        self._verrou = threading.Lock()
+
+    @property
+    def taille_octets(self) -> int:
+        return sum(self._tailles.values())
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def __contains__(self, cle):
+        return cle in self._entrees
+
+    def obtenir(self, cle, calculer):
+        """Renvoie la valeur associée à ``cle``, en la calculant avec ``calculer()`` si absente."""
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                return self._entrees[cle]
+
+        # Calcul hors verrou pour ne pas bloquer les autres sessions pendant l'analyse
+        valeur = calculer()
+        taille = self.mesurer(valeur)
+
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._tailles[cle] = taille
+            self._entrees.move_to_end(cle)
+            self._evincer()
+        return valeur
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._tailles.clear()
+
+    def _evincer(self):
+        # La dernière entrée insérée est toujours conservée, même si elle dépasse seule le plafond
+        while len(self._entrees) > 1 and self.taille_octets > self.taille_max_octets:
+            cle, _ = self._entrees.popitem(last=False)
+            del self._tailles[cle]
+
+
+cache_analyses = CacheLRU(TAILLE_MAX_DEFAUT_MO * 1024 * 1024)
@@ -0,0 +1,385 @@
+"""Diagnostics CIM-10 rattachés aux séjours et regroupés par chapitre, bloc et catégorie.
+
+Les 2 600 catégories possibles (lettre suivie de deux chiffres) sont rattachées
+une fois pour toutes à leur chapitre et à leur bloc : regrouper les diagnostics
+revient ensuite à indexer ces tableaux avec les codes de catégorie, sans
+comparer de chaînes ligne à ligne. Chaque niveau est stocké en ``Categorical``
+et les effectifs sont comptés directement sur les codes (``np.bincount``).
+"""
+from string import ascii_uppercase
+
+import numpy as np
+import pandas as pd
+
+from rhs.sejours import positions_sejours, selon_sejour
+
+# (numéro, première catégorie, dernière catégorie, libellé)
+CHAPITRES = [
+    ("I", "A00", "B99", "Certaines maladies infectieuses et parasitaires"),
+    ("II", "C00", "D48", "Tumeurs"),
+    ("III", "D50", "D89", "Maladies du sang et des organes hématopoïétiques et troubles du système immunitaire"),
+    ("IV", "E00", "E90", "Maladies endocriniennes, nutritionnelles et métaboliques"),
+    ("V", "F00", "F99", "Troubles mentaux et du comportement"),
+    ("VI", "G00", "G99", "Maladies du système nerveux"),
+    ("VII", "H00", "H59", "Maladies de l'œil et de ses annexes"),
+    ("VIII", "H60", "H95", "Maladies de l'oreille et de l'apophyse mastoïde"),
+    ("IX", "I00", "I99", "Maladies de l'appareil circulatoire"),
+    ("X", "J00", "J99", "Maladies de l'appareil respiratoire"),
+    ("XI", "K00", "K93", "Maladies de l'appareil digestif"),
+    ("XII", "L00", "L99", "Maladies de la peau et du tissu cellulaire sous-cutané"),
+    ("XIII", "M00", "M99", "Maladies du système ostéo-articulaire, des muscles et du tissu conjonctif"),
+    ("XIV", "N00", "N99", "Maladies de l'appareil génito-urinaire"),
+    ("XV", "O00", "O99", "Grossesse, accouchement et puerpéralité"),
+    ("XVI", "P00", "P96", "Certaines affections dont l'origine se situe dans la période périnatale"),
+    ("XVII", "Q00", "Q99", "Malformations congénitales et anomalies chromosomiques"),
+    ("XVIII", "R00", "R99", "Symptômes, signes et résultats anormaux d'examens, non classés ailleurs"),
+    ("XIX", "S00", "T98", "Lésions traumatiques, empoisonnements et autres conséquences de causes externes"),
+    ("XX", "V01", "Y98", "Causes externes de morbidité et de mortalité"),
+    ("XXI", "Z00", "Z99", "Facteurs influant sur l'état de santé et motifs de recours aux services de santé"),
+    ("XXII", "U00", "U99", "Codes d'utilisation particulière"),
+]
+
+# (première catégorie, dernière catégorie, libellé)
+BLOCS = [
+    ("A00", "A09", "Maladies intestinales infectieuses"),
+    ("A15", "A19", "Tuberculose"),
+    ("A20", "A28", "Certaines anthropozoonoses bactériennes"),
+    ("A30", "A49", "Autres maladies bactériennes"),
+    ("A50", "A64", "Infections transmises essentiellement par voie sexuelle"),
+    ("A65", "A69", "Autres maladies à spirochètes"),
+    ("A70", "A74", "Autres maladies à Chlamydia"),
+    ("A75", "A79", "Rickettsioses"),
+    ("A80", "A89", "Infections virales du système nerveux central"),
+    ("A90", "A99", "Fièvres virales transmises par des arthropodes et fièvres virales hémorragiques"),
+    ("B00", "B09", "Infections virales caractérisées par des lésions cutanéo-muqueuses"),
+    ("B15", "B19", "Hépatites virales"),
+    ("B20", "B24", "Maladies dues au virus de l'immunodéficience humaine"),
+    ("B25", "B34", "Autres maladies virales"),
+    ("B35", "B49", "Mycoses"),
+    ("B50", "B64", "Maladies dues à des protozoaires"),
+    ("B65", "B83", "Helminthiases"),
+    ("B85", "B89", "Pédiculose, acariase et autres infestations"),
+    ("B90", "B94", "Séquelles de maladies infectieuses et parasitaires"),
+    ("B95", "B98", "Agents d'infections bactériennes, virales et autres"),
+    ("B99", "B99", "Autres maladies infectieuses"),
+    ("C00", "C14", "Tumeurs malignes de la lèvre, de la cavité buccale et du pharynx"),
+    ("C15", "C26", "Tumeurs malignes des organes digestifs"),
+    ("C30", "C39", "Tumeurs malignes des organes respiratoires et intrathoraciques"),
+    ("C40", "C41", "Tumeurs malignes des os et du cartilage articulaire"),
+    ("C43", "C44", "Mélanome et autres tumeurs malignes de la peau"),
+    ("C45", "C49", "Tumeurs malignes du tissu mésothélial et des tissus mous"),
+    ("C50", "C50", "Tumeur maligne du sein"),
+    ("C51", "C58", "Tumeurs malignes des organes génitaux de la femme"),
+    ("C60", "C63", "Tumeurs malignes des organes génitaux de l'homme"),
+    ("C64", "C68", "Tumeurs malignes des voies urinaires"),
+    ("C69", "C72", "Tumeurs malignes de l'œil, de l'encéphale et du système nerveux central"),
+    ("C73", "C75", "Tumeurs malignes de la thyroïde et d'autres glandes endocrines"),
+    ("C76", "C80", "Tumeurs malignes de sièges mal définis, secondaires et non précisés"),
+    ("C81", "C96", "Tumeurs malignes des tissus lymphoïde, hématopoïétique et apparentés"),
+    ("C97", "C97", "Tumeurs malignes de sièges multiples indépendants"),
+    ("D00", "D09", "Tumeurs in situ"),
+    ("D10", "D36", "Tumeurs bénignes"),
+    ("D37", "D48", "Tumeurs à évolution imprévisible ou inconnue"),
+    ("D50", "D53", "Anémies nutritionnelles"),
+    ("D55", "D59", "Anémies hémolytiques"),
+    ("D60", "D64", "Aplasies médullaires et autres anémies"),
+    ("D65", "D69", "Anomalies de la coagulation, purpura et autres affections hémorragiques"),
+    ("D70", "D77", "Autres maladies du sang et des organes hématopoïétiques"),
+    ("D80", "D89", "Certaines anomalies du système immunitaire"),
+    ("E00", "E07", "Affections de la glande thyroïde"),
+    ("E10", "E14", "Diabète sucré"),
+    ("E15", "E16", "Autres anomalies de la régulation du glucose et de la sécrétion pancréatique interne"),
+    ("E20", "E35", "Maladies des autres glandes endocrines"),
+    ("E40", "E46", "Malnutrition"),
+    ("E50", "E64", "Autres carences nutritionnelles"),
+    ("E65", "E68", "Obésité et autres excès d'apport"),
+    ("E70", "E90", "Anomalies du métabolisme"),
+    ("F00", "F09", "Troubles mentaux organiques, y compris les troubles symptomatiques"),
+    ("F10", "F19", "Troubles liés à l'utilisation de substances psycho-actives"),
+    ("F20", "F29", "Schizophrénie, trouble schizotypique et troubles délirants"),
+    ("F30", "F39", "Troubles de l'humeur"),
+    ("F40", "F48", "Troubles névrotiques, troubles liés à des facteurs de stress et troubles somatoformes"),
+    ("F50", "F59", "Syndromes comportementaux associés à des perturbations physiologiques"),
+    ("F60", "F69", "Troubles de la personnalité et du comportement chez l'adulte"),
+    ("F70", "F79", "Retard mental"),
+    ("F80", "F89", "Troubles du développement psychologique"),
+    ("F90", "F98", "Troubles du comportement et troubles émotionnels de l'enfance et de l'adolescence"),
+    ("F99", "F99", "Trouble mental, sans précision"),
+    ("G00", "G09", "Maladies inflammatoires du système nerveux central"),
+    ("G10", "G14", "Affections dégénératives systémiques du système nerveux central"),
+    ("G20", "G26", "Syndromes extrapyramidaux et troubles de la motricité"),
+    ("G30", "G32", "Autres affections dégénératives du système nerveux"),
+    ("G35", "G37", "Maladies démyélinisantes du système nerveux central"),
+    ("G40", "G47", "Affections épisodiques et paroxystiques"),
+    ("G50", "G59", "Affections des nerfs, des racines et des plexus nerveux"),
+    ("G60", "G64", "Polynévrites et autres affections du système nerveux périphérique"),
+    ("G70", "G73", "Affections musculaires et de la jonction neuromusculaire"),
+    ("G80", "G83", "Paralysies cérébrales et autres syndromes paralytiques"),
+    ("G90", "G99", "Autres affections du système nerveux"),
+    ("H00", "H06", "Affections de la paupière, de l'appareil lacrymal et de l'orbite"),
+    ("H10", "H13", "Affections de la conjonctive"),
+    ("H15", "H22", "Affections de la sclérotique, de la cornée, de l'iris et du corps ciliaire"),
+    ("H25", "H28", "Affections du cristallin"),
+    ("H30", "H36", "Affections de la choroïde et de la rétine"),
+    ("H40", "H42", "Glaucome"),
+    ("H43", "H45", "Affections du corps vitré et du globe oculaire"),
+    ("H46", "H48", "Affections du nerf et des voies optiques"),
+    ("H49", "H52", "Affections des muscles oculaires, de l'accommodation et de la réfraction"),
+    ("H53", "H54", "Troubles de la vision et cécité"),
+    ("H55", "H59", "Autres affections de l'œil et de ses annexes"),
+    ("H60", "H62", "Maladies de l'oreille externe"),
+    ("H65", "H75", "Maladies de l'oreille moyenne et de l'apophyse mastoïde"),
+    ("H80", "H83", "Maladies de l'oreille interne"),
+    ("H90", "H95", "Autres affections de l'oreille"),
+    ("I00", "I02", "Rhumatisme articulaire aigu"),
+    ("I05", "I09", "Cardiopathies rhumatismales chroniques"),
+    ("I10", "I15", "Maladies hypertensives"),
+    ("I20", "I25", "Cardiopathies ischémiques"),
+    ("I26", "I28", "Cardiopathies pulmonaires et maladies de la circulation pulmonaire"),
+    ("I30", "I52", "Autres formes de cardiopathies"),
+    ("I60", "I69", "Maladies cérébrovasculaires"),
+    ("I70", "I79", "Maladies des artères, artérioles et capillaires"),
+    ("I80", "I89", "Maladies des veines, des vaisseaux et des ganglions lymphatiques"),
+    ("I95", "I99", "Troubles autres et non précisés de l'appareil circulatoire"),
+    ("J00", "J06", "Affections aiguës des voies respiratoires supérieures"),
+    ("J09", "J18", "Grippe et pneumopathie"),
+    ("J20", "J22", "Autres affections aiguës des voies respiratoires inférieures"),
+    ("J30", "J39", "Autres maladies des voies respiratoires supérieures"),
+    ("J40", "J47", "Maladies chroniques des voies respiratoires inférieures"),
+    ("J60", "J70", "Maladies du poumon dues à des agents externes"),
+    ("J80", "J84", "Autres maladies respiratoires touchant principalement le tissu interstitiel"),
+    ("J85", "J86", "Affections suppurées et nécrotiques des voies respiratoires inférieures"),
+    ("J90", "J94", "Autres affections de la plèvre"),
+    ("J95", "J99", "Autres maladies de l'appareil respiratoire"),
+    ("K00", "K14", "Maladies de la cavité buccale, des glandes salivaires et des maxillaires"),
+    ("K20", "K31", "Maladies de l'œsophage, de l'estomac et du duodénum"),
+    ("K35", "K38", "Maladies de l'appendice"),
+    ("K40", "K46", "Hernies"),
+    ("K50", "K52", "Entérites et colites non infectieuses"),
+    ("K55", "K64", "Autres maladies de l'intestin"),
+    ("K65", "K67", "Maladies du péritoine"),
+    ("K70", "K77", "Maladies du foie"),
+    ("K80", "K87", "Maladies de la vésicule biliaire, des voies biliaires et du pancréas"),
+    ("K90", "K93", "Autres maladies de l'appareil digestif"),
+    ("L00", "L08", "Infections de la peau et du tissu cellulaire sous-cutané"),
+    ("L10", "L14", "Dermatoses bulleuses"),
+    ("L20", "L30", "Dermatoses et eczéma"),
+    ("L40", "L45", "Lésions papulo-squameuses"),
+    ("L50", "L54", "Urticaire et érythème"),
+    ("L55", "L59", "Affections de la peau liées à une irradiation"),
+    ("L60", "L75", "Maladies des phanères"),
+    ("L80", "L99", "Autres affections de la peau et du tissu cellulaire sous-cutané"),
+    ("M00", "M25", "Arthropathies"),
+    ("M30", "M36", "Affections disséminées du tissu conjonctif"),
+    ("M40", "M54", "Dorsopathies"),
+    ("M60", "M79", "Affections des tissus mous"),
+    ("M80", "M94", "Ostéopathies et chondropathies"),
+    ("M95", "M99", "Autres affections du système ostéo-articulaire, des muscles et du tissu conjonctif"),
+    ("N00", "N08", "Glomérulopathies"),
+    ("N10", "N16", "Maladies rénales tubulo-interstitielles"),
+    ("N17", "N19", "Insuffisance rénale"),
+    ("N20", "N23", "Lithiases urinaires"),
+    ("N25", "N29", "Autres affections du rein et de l'uretère"),
+    ("N30", "N39", "Autres maladies de l'appareil urinaire"),
+    ("N40", "N51", "Maladies des organes génitaux de l'homme"),
+    ("N60", "N64", "Affections du sein"),
+    ("N70", "N77", "Affections inflammatoires des organes pelviens de la femme"),
+    ("N80", "N98", "Affections non inflammatoires de l'appareil génital de la femme"),
+    ("N99", "N99", "Autres affections de l'appareil génito-urinaire"),
+    ("O00", "O08", "Grossesse se terminant par un avortement"),
+    ("O10", "O16", "Œdème, protéinurie et hypertension au cours de la grossesse"),
+    ("O20", "O29", "Autres affections maternelles liées principalement à la grossesse"),
+    ("O30", "O48", "Soins maternels liés au fœtus et à la cavité amniotique"),
+    ("O60", "O75", "Complications du travail et de l'accouchement"),
+    ("O80", "O84", "Accouchement"),
+    ("O85", "O92", "Complications principalement liées à la puerpéralité"),
+    ("O94", "O99", "Autres problèmes obstétricaux, non classés ailleurs"),
+    ("P00", "P04", "Fœtus et nouveau-né affectés par des facteurs maternels et obstétricaux"),
+    ("P05", "P08", "Anomalies liées à la durée de la gestation et à la croissance du fœtus"),
+    ("P10", "P15", "Traumatismes obstétricaux"),
+    ("P20", "P29", "Affections respiratoires et cardiovasculaires de la période périnatale"),
+    ("P35", "P39", "Infections spécifiques de la période périnatale"),
+    ("P50", "P61", "Affections hémorragiques et hématologiques du fœtus et du nouveau-né"),
+    ("P70", "P74", "Affections endocriniennes et métaboliques transitoires du fœtus et du nouveau-né"),
+    ("P75", "P78", "Affections de l'appareil digestif du fœtus et du nouveau-né"),
+    ("P80", "P83", "Affections des téguments et de la régulation thermique du fœtus et du nouveau-né"),
+    ("P90", "P96", "Autres affections dont l'origine se situe dans la période périnatale"),
+    ("Q00", "Q07", "Malformations congénitales du système nerveux"),
+    ("Q10", "Q18", "Malformations congénitales de l'œil, de l'oreille, de la face et du cou"),
+    ("Q20", "Q28", "Malformations congénitales de l'appareil circulatoire"),
+    ("Q30", "Q34", "Malformations congénitales de l'appareil respiratoire"),
+    ("Q35", "Q37", "Fente labiale et fente palatine"),
+    ("Q38", "Q45", "Autres malformations congénitales de l'appareil digestif"),
+    ("Q50", "Q56", "Malformations congénitales des organes génitaux"),
+    ("Q60", "Q64", "Malformations congénitales de l'appareil urinaire"),
+    ("Q65", "Q79", "Malformations et déformations congénitales du système ostéo-articulaire et des muscles"),
+    ("Q80", "Q89", "Autres malformations congénitales"),
+    ("Q90", "Q99", "Anomalies chromosomiques, non classées ailleurs"),
+    ("R00", "R09", "Symptômes et signes relatifs aux appareils circulatoire et respiratoire"),
+    ("R10", "R19", "Symptômes et signes relatifs à l'appareil digestif et à l'abdomen"),
+    ("R20", "R23", "Symptômes et signes relatifs à la peau et au tissu cellulaire sous-cutané"),
+    ("R25", "R29", "Symptômes et signes relatifs aux systèmes nerveux et ostéo-musculaire"),
+    ("R30", "R39", "Symptômes et signes relatifs à l'appareil urinaire"),
+    ("R40", "R46", "Symptômes et signes relatifs à la connaissance, la perception, l'humeur et le comportement"),
+    ("R47", "R49", "Symptômes et signes relatifs au langage et à la voix"),
+    ("R50", "R69", "Symptômes et signes généraux"),
+    ("R70", "R79", "Résultats anormaux de l'examen du sang, sans diagnostic"),
+    ("R80", "R82", "Résultats anormaux de l'examen des urines, sans diagnostic"),
+    ("R83", "R89", "Résultats anormaux de l'examen d'autres liquides, substances et tissus"),
+    ("R90", "R94", "Résultats anormaux d'imagerie diagnostique et d'épreuves fonctionnelles"),
+    ("R95", "R99", "Causes de mortalité mal définies et inconnues"),
+    ("S00", "S09", "Lésions traumatiques de la tête"),
+    ("S10", "S19", "Lésions traumatiques du cou"),
+    ("S20", "S29", "Lésions traumatiques du thorax"),
+    ("S30", "S39", "Lésions traumatiques de l'abdomen, des lombes, du rachis lombaire et du bassin"),
+    ("S40", "S49", "Lésions traumatiques de l'épaule et du bras"),
+    ("S50", "S59", "Lésions traumatiques du coude et de l'avant-bras"),
+    ("S60", "S69", "Lésions traumatiques du poignet et de la main"),
+    ("S70", "S79", "Lésions traumatiques de la hanche et de la cuisse"),
+    ("S80", "S89", "Lésions traumatiques du genou et de la jambe"),
+    ("S90", "S99", "Lésions traumatiques de la cheville et du pied"),
+    ("T00", "T07", "Lésions traumatiques de plusieurs parties du corps"),
+    ("T08", "T14", "Lésions traumatiques de siège non précisé"),
+    ("T15", "T19", "Effets dus à un corps étranger ayant pénétré dans un orifice naturel"),
+    ("T20", "T32", "Brûlures et corrosions"),
+    ("T33", "T35", "Gelures"),
+    ("T36", "T50", "Intoxications par des médicaments et des substances biologiques"),
+    ("T51", "T65", "Effets toxiques de substances d'origine essentiellement non médicinale"),
+    ("T66", "T78", "Effets de causes externes, autres et non précisés"),
+    ("T79", "T79", "Certaines complications précoces des traumatismes"),
+    ("T80", "T88", "Complications de soins chirurgicaux et médicaux, non classées ailleurs"),
+    ("T90", "T98", "Séquelles de lésions traumatiques, d'empoisonnements et de causes externes"),
+    ("U00", "U49", "Attribution provisoire de nouvelles affections"),
+    ("U50", "U99", "Autres codes d'utilisation particulière"),
+    ("V01", "X59", "Accidents"),
+    ("X60", "X84", "Lésions auto-infligées"),
+    ("X85", "Y09", "Agressions"),
+    ("Y10", "Y34", "Événements dont l'intention n'est pas déterminée"),
+    ("Y35", "Y36", "Interventions de la force publique et faits de guerre"),
+    ("Y40", "Y84", "Complications de soins médicaux et chirurgicaux"),
+    ("Y85", "Y89", "Séquelles de causes externes de morbidité et de mortalité"),
+    ("Y90", "Y98", "Facteurs supplémentaires se rapportant aux causes classées ailleurs"),
+    ("Z00", "Z13", "Recours aux services de santé pour examen médical"),
+    ("Z20", "Z29", "Risques liés à des maladies transmissibles"),
+    ("Z30", "Z39", "Recours aux services de santé pour des motifs liés à la reproduction"),
+    ("Z40", "Z54", "Recours aux services de santé pour des actes médicaux et des soins spécifiques"),
+    ("Z55", "Z65", "Risques liés aux conditions socio-économiques et psycho-sociales"),
+    ("Z70", "Z76", "Recours aux services de santé pour d'autres motifs"),
+    ("Z80", "Z99", "Risques liés aux antécédents personnels et familiaux et à certaines affections"),
+]
+
+# Rôle de chaque type de diagnostic du RHS dans le séjour
+ROLES = {
+    "FPP": "Principal",  # Finalité principale de prise en charge
+    "MMP": "Principal",  # Manifestation morbide principale
+    "AE": "Étiologique",  # Affection étiologique
+    "DA": "Associé",
+}
+ROLE_NON_PRECISE = "Non précisé"
+ORDRE_ROLES = ["Principal", "Étiologique", "Associé", ROLE_NON_PRECISE]
+
+# Niveaux de regroupement proposés, du plus fin au plus large
+NIVEAUX = {
+    "Code complet": "code",
+    "Catégorie (3 caractères)": "categorie",
+    "Bloc": "bloc",
+    "Chapitre": "chapitre",
+}
+
+
+def _index_prefixes():
+    """Chapitre et bloc de chacune des catégories ``A00`` à ``Z99`` (-1 si hors nomenclature)."""
+    categories = np.array([f"{lettre}{numero:02d}" for lettre in ascii_uppercase for numero in range(100)])
+    chapitres = np.full(len(categories), -1, dtype=np.int16)
+    blocs = np.full(len(categories), -1, dtype=np.int16)
+    for position, (_, debut, fin, _) in enumerate(CHAPITRES):
+        chapitres[(categories >= debut) & (categories <= fin)] = position
+    for position, (debut, fin, _) in enumerate(BLOCS):
+        blocs[(categories >= debut) & (categories <= fin)] = position
+    return pd.Index(categories), chapitres, blocs
+
+
+CATEGORIES, CHAPITRE_PAR_CATEGORIE, BLOC_PAR_CATEGORIE = _index_prefixes()
+LIBELLES_CHAPITRES = [f"{numero} - {libelle}" for numero, _, _, libelle in CHAPITRES]
+LIBELLES_BLOCS = [f"{debut}-{fin} {libelle}" for debut, fin, libelle in BLOCS]
+
+
+def table_diagnostics(diagnostics: pd.DataFrame, sejours: pd.DataFrame) -> pd.DataFrame:
+    """Diagnostics rattachés à leur séjour, avec leur rôle et leurs niveaux de regroupement.
+
+    ``sejour`` est la position dans ``sejours`` du séjour de chaque diagnostic
+    (voir ``positions_sejours``), -1 s'il n'est rattaché à aucun séjour.
+    """
+    positions = positions_sejours(sejours, diagnostics["id_sejour"])
+
+    # Chaque code distinct n'est normalisé et classé qu'une fois
+    codes_bruts, valeurs = pd.factorize(diagnostics["diagnostic"])
+    valeurs = pd.Index(valeurs, dtype=object).str.replace(".", "", regex=False).str.strip().str.upper()
+    codes, normalises = pd.factorize(valeurs)
+    codes = np.where(codes_bruts >= 0, codes[codes_bruts], -1)
+
+    categorie_par_code = CATEGORIES.get_indexer(normalises.str[:3])
+    categories = np.where(codes >= 0, categorie_par_code[codes], -1)
+    connues = categories >= 0
+    chapitres = np.where(connues, CHAPITRE_PAR_CATEGORIE[categories], -1)
+    blocs = np.where(connues, BLOC_PAR_CATEGORIE[categories], -1)
+
+    roles = diagnostics["type_diagnostic"].map(ROLES).fillna(ROLE_NON_PRECISE)
+
+    return pd.DataFrame({
+        "sejour": positions,
+        "identifiant": selon_sejour(sejours["identifiant"].to_numpy(), positions),
+        "type_diagnostic": diagnostics["type_diagnostic"].to_numpy(),
+        "role": pd.Categorical(roles, categories=ORDRE_ROLES),
+        "code": pd.Categorical.from_codes(codes, categories=normalises),
+        "categorie": pd.Categorical.from_codes(categories, categories=CATEGORIES),
+        "bloc": pd.Categorical.from_codes(blocs, categories=LIBELLES_BLOCS),
+        "chapitre": pd.Categorical.from_codes(chapitres, categories=LIBELLES_CHAPITRES),
+    })
+
+
+def caracteristique_sejour(diagnostics: pd.DataFrame, serie_sejours: pd.Series) -> pd.Categorical:
+    """Valeur de ``serie_sejours`` (catégorielle, une ligne par séjour) pour le séjour de chaque diagnostic."""
+    return selon_sejour(serie_sejours.array, diagnostics["sejour"].to_numpy())
+
+
+def effectifs(diagnostics: pd.DataFrame, niveau: str) -> pd.DataFrame:
+    """Nombre de diagnostics et de séjours distincts par valeur de ``niveau``, du plus fréquent au moins fréquent."""
+    serie = diagnostics[niveau]
+    codes = serie.cat.codes.to_numpy()
+    nb_valeurs = len(serie.cat.categories)
+    connus = codes >= 0
+
+    nb_diagnostics = np.bincount(codes[connus], minlength=nb_valeurs)
+    # Un séjour portant deux fois le même regroupement n'est compté qu'une fois
+    sejours = diagnostics["sejour"].to_numpy()
+    rattaches = connus & (sejours >= 0)
+    # ``sejour`` est une position dans toute la table des séjours, que la sélection peut ne pas couvrir
+    nb_positions = int(sejours[rattaches].max(initial=-1)) + 1
+    paires = np.sort(codes[rattaches].astype(np.int64) * nb_positions + sejours[rattaches])
+    paires = paires[np.r_[True, paires[1:] != paires[:-1]]] if len(paires) else paires
+    nb_sejours = np.bincount(paires // max(nb_positions, 1), minlength=nb_valeurs)
+
+    presents = np.flatnonzero(nb_diagnostics)
+    resultat = pd.DataFrame({
+        niveau: serie.cat.categories[presents],
+        "fréquence": nb_diagnostics[presents],
+        "nb_sejours": nb_sejours[presents],
+    })
+    return resultat.sort_values("fréquence", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def tableau_croise(lignes: pd.Categorical, colonnes: pd.Categorical) -> pd.DataFrame:
+    """Effectifs croisés de deux séries catégorielles, comptés directement sur leurs codes.
+
+    Toutes les colonnes sont conservées (dans leur ordre), seules les lignes présentes le sont.
+    """
+    codes_lignes, codes_colonnes = np.asarray(lignes.codes), np.asarray(colonnes.codes)
+    nb_lignes, nb_colonnes = len(lignes.categories), len(colonnes.categories)
+    valides = (codes_lignes >= 0) & (codes_colonnes >= 0)
+    comptes = np.bincount(
+        codes_lignes[valides].astype(np.int64) * nb_colonnes + codes_colonnes[valides],
+        minlength=nb_lignes * nb_colonnes,
+    ).reshape(nb_lignes, nb_colonnes)
+    tableau = pd.DataFrame(comptes, index=lignes.categories, columns=colonnes.categories)
+    return tableau[tableau.sum(axis=1) > 0]
@@ -0,0 +1,135 @@
+"""Historique multi-mois des extraits RHS, stocké sur disque au format Parquet.
+
+Chaque extrait importé est analysé une seule fois puis ajouté au corpus : ses
+tables sont écrites dans ``<racine>/<table>/mois=AAAA-MM/extrait-NNNNN.parquet``,
+le mois étant celui de l'entrée du séjour. Les fichiers existants ne sont jamais
+réécrits ; un manifeste ``extraits.json`` liste les extraits et leur empreinte,
+pour ne pas ajouter deux fois le même fichier.
+
+Les extraits successifs se recouvrent (un séjour en cours figure dans plusieurs
+envois mensuels). À la lecture, chaque séjour, identifié par son identifiant et
+sa date d'entrée, n'est repris que depuis l'extrait le plus récent qui le
+contient, avec ses actes et ses diagnostics.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from rhs.formats import concatener
+from rhs.parsing import DonneesRHS
+
+RACINE_CORPUS = Path(os.environ.get("RHS_CORPUS_DIR", Path(__file__).resolve().parent.parent / "donnees_corpus"))
+TABLES = ("sejours", "actes", "diagnostics")
+MOIS_INCONNU = "inconnu"
+# Décalage appliqué à ``id_ligne`` et ``id_sejour`` pour que les lignes de deux extraits ne se confondent pas
+DECALAGE_EXTRAIT = 2 ** 32
+
+
+def preparer_extrait(donnees: DonneesRHS, numero: int) -> dict:
+    """Tables d'un extrait complétées de ``extrait``, ``cle_sejour`` et ``mois``.
+
+    Les actes et diagnostics reprennent la clé et le mois de leur séjour (``id_sejour``).
+    """
+    sejours = donnees.sejours.assign(extrait=numero)
+    sejours["id_ligne"] = sejours["id_ligne"].astype("int64")
+    sejours["cle_sejour"] = sejours["identifiant"] + "|" + sejours["date_entree"].dt.strftime("%Y%m%d")
+    sejours["mois"] = sejours["date_entree"].dt.strftime("%Y-%m").fillna(MOIS_INCONNU)
+    rattachement = sejours.set_index("id_ligne")[["cle_sejour", "mois"]]
+
+    tables = {"sejours": sejours}
+    for nom in ("actes", "diagnostics"):
+        table = getattr(donnees, nom).assign(extrait=numero)
+        table["id_ligne"] = table["id_ligne"].astype("int64")
+        table = table.join(rattachement, on="id_sejour")
+        table["mois"] = table["mois"].fillna(MOIS_INCONNU)
+        tables[nom] = table
+    return tables
+
+
+def combiner_extraits(extraits: list) -> DonneesRHS:
+    """Réunit des extraits préparés en ne gardant que la version la plus récente de chaque séjour."""
+    return _dedupliquer({nom: concatener([e[nom] for e in extraits]) for nom in TABLES})
+
+
+def _dedupliquer(tables: dict) -> DonneesRHS:
+    dernier_extrait = tables["sejours"].groupby("cle_sejour")["extrait"].max()
+
+    resultat = {}
+    for nom, table in tables.items():
+        # Les lignes sans séjour identifiable sont conservées telles quelles
+        retenu = table["cle_sejour"].map(dernier_extrait)
+        table = table[table["cle_sejour"].isna() | (table["extrait"] == retenu)].copy()
+        decalage = table["extrait"].astype("int64") * DECALAGE_EXTRAIT
+        table["id_ligne"] = decalage + table["id_ligne"]
+        if nom != "sejours":
+            table["id_sejour"] = (decalage + table["id_sejour"]).where(table["id_sejour"] >= 0, -1)
+        resultat[nom] = (
+            table.sort_values("id_ligne", kind="stable")
+            .drop(columns=["extrait", "cle_sejour", "mois"])
+            .reset_index(drop=True)
+        )
+    return DonneesRHS(**resultat)
+
+
+class CorpusRHS:
+    """Corpus d'extraits RHS stocké sous ``racine``, partagé par toutes les sessions."""
+
+    _verrou = threading.Lock()
+
+    def __init__(self, racine=RACINE_CORPUS):
+        self.racine = Path(racine)
+        self.manifeste = self.racine / "extraits.json"
+
+    def extraits(self) -> list:
+        if not self.manifeste.exists():
+            return []
+        return json.loads(self.manifeste.read_text(encoding="utf-8"))
+
+    def signature(self) -> str:
+        """Identifie l'état du corpus : change à chaque extrait ajouté."""
+        return "corpus:" + ",".join(e["empreinte"] for e in self.extraits())
+
+    def contient(self, empreinte: str) -> bool:
+        return any(e["empreinte"] == empreinte for e in self.extraits())
+
+    def ajouter(self, donnees: DonneesRHS, empreinte: str, nom_fichier: str) -> bool:
+        """Ajoute un extrait analysé ; renvoie False s'il figurait déjà dans le corpus."""
+        with self._verrou:
+            extraits = self.extraits()
+            if any(e["empreinte"] == empreinte for e in extraits):
+                return False
+            numero = max((e["numero"] for e in extraits), default=0) + 1
+
+            for nom, table in preparer_extrait(donnees, numero).items():
+                # Une table vide est tout de même écrite, pour que chaque extrait figure dans chaque table
+                parties = table.groupby("mois") if not table.empty else [(MOIS_INCONNU, table)]
+                for mois, partie in parties:
+                    dossier = self.racine / nom / f"mois={mois}"
+                    dossier.mkdir(parents=True, exist_ok=True)
+                    partie.drop(columns="mois").to_parquet(dossier / f"extrait-{numero:05d}.parquet", index=False)
+
+            extraits.append({
+                "numero": numero,
+                "empreinte": empreinte,
+                "fichier": nom_fichier,
+                "date_import": datetime.now().isoformat(timespec="seconds"),
+                "nb_sejours": len(donnees.sejours),
+            })
+            self.racine.mkdir(parents=True, exist_ok=True)
+            self.manifeste.write_text(json.dumps(extraits, indent=2, ensure_ascii=False), encoding="utf-8")
+            return True
+
+    def charger(self) -> DonneesRHS:
+        """Lit l'ensemble du corpus et le dédoublonne entre extraits."""
+        return _dedupliquer({nom: self._lire_table(nom) for nom in TABLES})
+
+    def _lire_table(self, nom):
+        parties = [
+            pd.read_parquet(fichier).assign(mois=fichier.parent.name.split("=", 1)[1])
+            for fichier in sorted((self.racine / nom).glob("mois=*/extrait-*.parquet"))
+        ]
+        return concatener(parties)
@@ -0,0 +1,173 @@
+"""Cube d'agrégats précalculés : les synthèses sont obtenues en regroupant ses cellules.
+
+Les tables de détail sont résumées une fois par jeu de données en trois tables
+de cellules non vides, une par fait compté :
+
+- ``cube_actes`` : actes CSARR par mois, jour de la semaine, classe d'âge,
+  chapitre principal du séjour et code d'acte ;
+- ``cube_sejours`` : séjours par mois d'entrée, classe d'âge, chapitre principal,
+  classe de durée et durée en semaines entières, avec la somme exacte des durées.
+  L'effectif par semaine est un histogramme qui sert d'esquisse aux quantiles ;
+- ``cube_diagnostics`` : diagnostics par type, chapitre, classe d'âge et classe
+  de durée de leur séjour.
+
+L'âge est ramené à des classes élémentaires, intersection des tranches de tous
+les découpages de ``rhs.tranches.DECOUPAGES`` : chaque tranche d'un découpage
+est une réunion de classes, et changer de découpage revient à regrouper des
+cellules. Le nombre de cellules dépend du nombre de valeurs des dimensions, et
+non du nombre de lignes du fichier ; regrouper le cube coûte donc le même temps
+quelle que soit la taille de l'extrait.
+"""
+import numpy as np
+import pandas as pd
+
+from rhs.sejours import positions_sejours, selon_sejour
+from rhs.tranches import DECOUPAGES, DecoupageAge
+
+# Bornes supérieures (incluses) des classes d'âge élémentaires, la dernière classe étant ouverte
+BORNES_CLASSES_AGE = np.array(sorted(set().union(*(d.bornes for d in DECOUPAGES.values()))))
+
+# Diagnostic retenu comme principal pour un séjour : manifestation morbide, à défaut finalité,
+# étiologie, puis diagnostic associé ; pour un fichier sans types, le premier diagnostic du séjour
+PRIORITE_DIAGNOSTIC_PRINCIPAL = {"MMP": 0, "FPP": 1, "AE": 2, "DA": 3}
+
+
+def classes_age(ages: pd.Series) -> np.ndarray:
+    """Classe d'âge élémentaire (entier 8 bits) de chaque âge, -1 si l'âge est manquant."""
+    valeurs = ages.to_numpy(dtype=float, na_value=np.nan)
+    classes = np.searchsorted(BORNES_CLASSES_AGE, valeurs, side="left").astype(np.int8)
+    return np.where(np.isnan(valeurs), np.int8(-1), classes)
+
+
+def tranches_des_classes(classes: pd.Series, decoupage: DecoupageAge) -> pd.Categorical:
+    """Tranche de ``decoupage`` de chaque classe d'âge élémentaire."""
+    # Un âge de chaque classe suffit à la situer : sa borne supérieure, ou la dernière borne + 1
+    representants = pd.Series([*BORNES_CLASSES_AGE, BORNES_CLASSES_AGE[-1] + 1])
+    tranche_de_classe = np.asarray(decoupage.categoriser(representants).cat.codes)
+    classes = np.asarray(classes)
+    codes = np.where(classes >= 0, tranche_de_classe[classes], -1)
+    return pd.Categorical.from_codes(codes, categories=decoupage.libelles, ordered=True)
+
+
+def chapitres_principaux(diagnostics: pd.DataFrame, nb_sejours: int) -> pd.Categorical:
+    """Chapitre CIM-10 du diagnostic principal de chaque séjour (manquant pour un séjour sans diagnostic)."""
+    sejours = diagnostics["sejour"].to_numpy()
+    rattaches = sejours >= 0
+    rangs = diagnostics["type_diagnostic"].map(PRIORITE_DIAGNOSTIC_PRINCIPAL).fillna(len(PRIORITE_DIAGNOSTIC_PRINCIPAL))
+    ordre = np.lexsort((rangs.to_numpy()[rattaches], sejours[rattaches]))
+    sejours_tries = sejours[rattaches][ordre]
+    premiers = np.r_[True, sejours_tries[1:] != sejours_tries[:-1]] if len(sejours_tries) else np.array([], bool)
+
+    chapitres = diagnostics["chapitre"].array
+    codes = np.full(nb_sejours, -1, dtype=np.int16)
+    codes[sejours_tries[premiers]] = np.asarray(chapitres.codes)[rattaches][ordre][premiers]
+    return pd.Categorical.from_codes(codes, categories=chapitres.categories)
+
+
+def _cellules(dimensions: dict, mesures: dict) -> pd.DataFrame:
+    """Cellules non vides : une ligne par combinaison de dimensions présente, avec la somme des mesures."""
+    detail = pd.DataFrame({**dimensions, **mesures})
+    return detail.groupby(list(dimensions), observed=True, dropna=False, sort=True)[list(mesures)].sum().reset_index()
+
+
+def cube_actes(actes: pd.DataFrame, sejours: pd.DataFrame, classes: np.ndarray,
+               chapitres: pd.Categorical) -> pd.DataFrame:
+    """Nombre d'actes par mois, jour de la semaine, classe d'âge, chapitre principal et acte.
+
+    ``classes`` et ``chapitres`` sont donnés par séjour, dans l'ordre de ``sejours``.
+    """
+    positions = positions_sejours(sejours, actes["id_sejour"])
+    dates = actes["date_acte"]
+    return _cellules({
+        "mois": dates.dt.to_period("M"),
+        "jour_semaine": dates.dt.dayofweek.astype("Int8"),
+        "classe_age": selon_sejour(classes, positions, np.int8(-1)),
+        "chapitre": selon_sejour(chapitres, positions),
+        "acte": actes["code_csarr"].astype("category"),
+    }, {"nb_actes": np.ones(len(actes), dtype=np.int64)})
+
+
+def cube_sejours(sejours: pd.DataFrame, classes: np.ndarray, chapitres: pd.Categorical) -> pd.DataFrame:
+    """Nombre de séjours et somme de leurs durées (semaines) par mois d'entrée, classe d'âge,
+    chapitre principal, classe de durée et durée en semaines entières (-1 : hospitalisation en cours).
+
+    ``sejours`` est la table ``sejours_ages``.
+    """
+    durees = sejours["duree_sejour_semaines"]
+    return _cellules({
+        "mois_entree": sejours["date_entree"].dt.to_period("M"),
+        "classe_age": classes,
+        "chapitre": chapitres,
+        "classe_duree": sejours["classe_duree"],
+        "semaines": np.floor(durees).fillna(-1).astype(np.int32),
+    }, {"nb_sejours": np.ones(len(sejours), dtype=np.int64), "somme_durees": durees.fillna(0).to_numpy()})
+
+
+def cube_diagnostics(diagnostics: pd.DataFrame, classes: np.ndarray, classes_duree: pd.Series) -> pd.DataFrame:
+    """Nombre de diagnostics par type, chapitre, classe d'âge et classe de durée de leur séjour."""
+    positions = diagnostics["sejour"].to_numpy()
+    return _cellules({
+        "role": diagnostics["role"],
+        "chapitre": diagnostics["chapitre"],
+        "classe_age": selon_sejour(classes, positions, np.int8(-1)),
+        "classe_duree": selon_sejour(classes_duree.array, positions),
+    }, {"nb_diagnostics": np.ones(len(diagnostics), dtype=np.int64)})
+
+
+def cumuler(cellules: pd.DataFrame, dimensions: list, mesures: list, decoupage: DecoupageAge = None) -> pd.DataFrame:
+    """Somme des ``mesures`` par valeur des ``dimensions``, calculée sur les cellules du cube.
+
+    La dimension ``tranche_age`` regroupe les classes d'âge élémentaires selon ``decoupage``.
+    """
+    if "tranche_age" in dimensions:
+        cellules = cellules.assign(tranche_age=tranches_des_classes(cellules["classe_age"], decoupage))
+    return cellules.groupby(dimensions, observed=True, sort=True)[mesures].sum().reset_index()
+
+
+def synthese_par_tranche(cellules: pd.DataFrame, decoupage: DecoupageAge) -> pd.DataFrame:
+    """Nombre de séjours terminés et durée moyenne (semaines) par tranche de ``decoupage``, toutes présentes."""
+    termines = cumuler(cellules[cellules["semaines"] >= 0], ["tranche_age"], ["nb_sejours", "somme_durees"], decoupage)
+    termines = termines.set_index("tranche_age").reindex(decoupage.libelles, fill_value=0)
+    synthese = pd.DataFrame({
+        "tranche_age": pd.Categorical(decoupage.libelles, categories=decoupage.libelles, ordered=True),
+        "nb_sejours": termines["nb_sejours"].to_numpy(),
+        "duree_moyenne": (termines["somme_durees"] / termines["nb_sejours"].where(termines["nb_sejours"] > 0))
+        .round(2).fillna(0).to_numpy(),
+    })
+    return synthese
+
+
+def quantiles_durees(cellules: pd.DataFrame, dimension: str, quantiles: dict,
+                     decoupage: DecoupageAge = None) -> pd.DataFrame:
+    """Quantiles des durées des séjours terminés (semaines entières) par valeur de ``dimension``.
+
+    Ils sont lus sur l'histogramme par semaine du cube : exacts à la semaine près.
+    ``quantiles`` associe un nom de colonne à chaque probabilité.
+    """
+    histogramme = cumuler(cellules[cellules["semaines"] >= 0], [dimension, "semaines"], ["nb_sejours"], decoupage)
+    groupes = histogramme.groupby(dimension, observed=True, sort=False)["nb_sejours"]
+    part_cumulee = groupes.cumsum() / groupes.transform("sum")
+    resultat = {}
+    for nom, probabilite in quantiles.items():
+        atteints = histogramme[part_cumulee >= probabilite]
+        resultat[nom] = atteints.groupby(dimension, observed=True)["semaines"].first()
+    return pd.DataFrame(resultat).rename_axis(dimension).reset_index()
+
+
+def croisement_chapitres(cellules: pd.DataFrame, colonne: str, roles=None, chapitre=None,
+                         decoupage: DecoupageAge = None) -> pd.DataFrame:
+    """Même résultat que ``rhs.cim10.tableau_croise`` au niveau des chapitres, à partir du cube des diagnostics.
+
+    ``colonne`` vaut ``"tranche_age"`` (selon ``decoupage``) ou ``"classe_duree"`` ;
+    ``roles`` et ``chapitre`` restreignent les diagnostics comptés.
+    """
+    if roles is not None:
+        cellules = cellules[cellules["role"].isin(roles)]
+    if chapitre is not None:
+        cellules = cellules[cellules["chapitre"] == chapitre]
+    comptes = cumuler(cellules, ["chapitre", colonne], ["nb_diagnostics"], decoupage)
+    categories_colonne = decoupage.libelles if colonne == "tranche_age" else cellules["classe_duree"].cat.categories
+    tableau = comptes.pivot(index="chapitre", columns=colonne, values="nb_diagnostics")
+    tableau = tableau.reindex(columns=categories_colonne).fillna(0).astype(np.int64)
+    tableau.index, tableau.columns = tableau.index.astype(str), pd.Index(list(categories_colonne))
+    return tableau[tableau.sum(axis=1) > 0]
@@ -0,0 +1,65 @@
+"""Sérialisation des tableaux en CSV et XLSX, mémorisée par version de tableau.
+
+Les fichiers ne sont produits qu'à la demande ; une fois produits, ils sont
+conservés dans un cache borné, indexé par l'empreinte du contenu du tableau :
+tant que le tableau ne change pas, aucun export n'est recalculé.
+"""
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from rhs.cache import CacheLRU
+
+MIME_CSV = "text/csv"
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+cache_exports = CacheLRU(int(os.environ.get("RHS_CACHE_EXPORTS_MO", "256")) * 1024 * 1024, mesurer=len)
+
+
+def empreinte_dataframe(df: pd.DataFrame) -> str:
+    """Empreinte du contenu d'un tableau (colonnes et valeurs, sans l'index)."""
+    sha = hashlib.sha256("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def exporter_csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def exporter_xlsx(feuilles: dict) -> bytes:
+    """Classeur Excel d'une feuille par tableau, en mode ``constant_memory``.
+
+    Dans ce mode, xlsxwriter écrit chaque ligne sur disque dès la suivante commencée ;
+    les cellules doivent donc être écrites ligne par ligne (``to_excel`` les écrit
+    colonne par colonne et perdrait des valeurs).
+    """
+    # Importé au premier export XLSX seulement : les pages s'affichent sans l'attendre
+    import xlsxwriter
+
+    buffer = io.BytesIO()
+    classeur = xlsxwriter.Workbook(buffer, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd",
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    })
+    for nom_feuille, df in feuilles.items():
+        feuille = classeur.add_worksheet(nom_feuille[:31])  # Excel limite à 31 caractères
+        feuille.write_row(0, 0, [str(c) for c in df.columns])
+        colonnes = [df[c].astype(object).where(df[c].notna(), None).tolist() for c in df.columns]
+        for i, ligne in enumerate(zip(*colonnes), start=1):
+            feuille.write_row(i, 0, ligne)
+    classeur.close()
+    return buffer.getvalue()
+
+
+def csv_memorise(df: pd.DataFrame) -> bytes:
+    return cache_exports.obtenir(("csv", empreinte_dataframe(df)), lambda: exporter_csv(df))
+
+
+def xlsx_memorise(feuilles: dict) -> bytes:
+    cle = ("xlsx",) + tuple((nom, empreinte_dataframe(df)) for nom, df in feuilles.items())
+    return cache_exports.obtenir(cle, lambda: exporter_xlsx(feuilles))
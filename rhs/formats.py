@@ -0,0 +1,276 @@
+"""Décodage à positions fixes des enregistrements RHS, selon la version du format ATIH.
+
+Chaque enregistrement RHS se compose d'une partie fixe, dont les champs occupent
+des positions connues, suivie d'une partie variable : les diagnostics associés,
+puis les actes CCAM, puis les actes CSARR, dont les nombres sont donnés dans la
+partie fixe. Le décodage découpe directement ces positions, sans expression
+régulière : la partie fixe dans une matrice d'octets NumPy (une ligne par
+enregistrement, de la largeur de la partie fixe), les zones variables dans le
+bloc d'octets de toutes les lignes mises bout à bout, à partir du début de
+chaque ligne. Un enregistrement portant beaucoup d'actes n'élargit donc pas la
+matrice des autres.
+
+Les positions sont indiquées à partir de 0 ; elles suivent la notice ATIH du
+format concerné. Pour prendre en charge une nouvelle version, il suffit d'ajouter
+son ``FormatRHS`` dans ``FORMATS_RHS``.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+POSITION_VERSION = (9, 3)
+
+# Colonnes et types des tables décodées, y compris lorsqu'elles sont vides
+SCHEMAS = {
+    "sejours": {
+        "id_ligne": "int64", "identifiant": "str", "date_entree": "datetime64[us]",
+        "date_sortie": "datetime64[us]", "date_naissance": "datetime64[us]",
+    },
+    "actes": {"id_ligne": "int64", "identifiant": "str", "code_csarr": "str", "date_acte": "datetime64[us]"},
+    "diagnostics": {"id_ligne": "int64", "diagnostic": "str", "type_diagnostic": "str"},
+}
+
+
+@dataclass(frozen=True)
+class FormatRHS:
+    version: str
+    # Champs de la partie fixe : nom -> (début, longueur)
+    champs: dict
+    debut_zone_variable: int
+    longueur_diagnostic: int
+    longueur_acte_ccam: int
+    longueur_acte_csarr: int
+    # Sous-champs d'une zone d'acte CSARR : nom -> (début relatif, longueur)
+    champs_acte_csarr: dict
+
+
+FORMAT_M0C = FormatRHS(
+    version="M0C",
+    champs={
+        "finess": (0, 9),
+        "version": (9, 3),
+        "num_sejour": (12, 20),
+        "num_rhs": (32, 20),
+        "date_naissance": (52, 8),
+        "sexe": (60, 1),
+        "unite_medicale": (61, 4),
+        "type_autorisation": (65, 3),
+        "date_entree": (68, 8),
+        "mode_entree": (76, 1),
+        "provenance": (77, 1),
+        "date_sortie": (78, 8),
+        "mode_sortie": (86, 1),
+        "destination": (87, 1),
+        "code_postal": (88, 5),
+        "date_lundi": (93, 8),
+        "jours_presence": (101, 7),
+        "type_hospitalisation": (108, 1),
+        "finalite_principale": (109, 8),
+        "manifestation_morbide": (117, 8),
+        "affection_etiologique": (125, 8),
+        "dependances": (133, 6),
+        "nb_diagnostics_associes": (139, 2),
+        "nb_actes_ccam": (141, 2),
+        "nb_actes_csarr": (143, 3),
+    },
+    debut_zone_variable=146,
+    longueur_diagnostic=8,
+    longueur_acte_ccam=29,
+    longueur_acte_csarr=36,
+    champs_acte_csarr={
+        "code": (0, 7),
+        "code_supplementaire": (7, 7),
+        "modulateur_lieu": (14, 2),
+        "modulateurs_patient": (16, 4),
+        "intervenant": (20, 2),
+        "date_realisation": (22, 8),
+        "nb_patients": (30, 2),
+        "nb_intervenants": (32, 2),
+        "nb_realisations": (34, 2),
+    },
+)
+
+FORMATS_RHS = {f.version: f for f in (FORMAT_M0C,)}
+
+# Diagnostics de la partie fixe, avec leur type
+DIAGNOSTICS_PARTIE_FIXE = {
+    "finalite_principale": "FPP",
+    "manifestation_morbide": "MMP",
+    "affection_etiologique": "AE",
+}
+
+
+def typer(table: pd.DataFrame, nom: str) -> pd.DataFrame:
+    """``table`` aux types de ``SCHEMAS[nom]`` (une table vide garde ainsi ses dates en datetime64)."""
+    return table.astype(SCHEMAS[nom])
+
+
+def table_vide(nom: str) -> pd.DataFrame:
+    return pd.DataFrame({colonne: pd.Series(dtype=type_colonne) for colonne, type_colonne in SCHEMAS[nom].items()})
+
+
+def concatener(tables: list, nom: str | None = None) -> pd.DataFrame:
+    """Tables non vides de ``tables`` mises bout à bout, aux types de ``SCHEMAS[nom]`` si ``nom`` est donné.
+
+    Si toutes sont vides : la table vide du schéma ``nom``, ou à défaut la première table.
+    """
+    non_vides = [t for t in tables if not t.empty]
+    if not non_vides:
+        return table_vide(nom) if nom else tables[0]
+    table = non_vides[0] if len(non_vides) == 1 else pd.concat(non_vides, ignore_index=True)
+    return typer(table, nom) if nom else table
+
+
+def lire_version(lignes):
+    """Version de format indiquée par la première ligne non vide, None si toutes sont vides."""
+    debut, longueur = POSITION_VERSION
+    for ligne in lignes:
+        if ligne.strip():
+            version = ligne[debut:debut + longueur]
+            if isinstance(version, bytes):
+                version = version.decode("latin-1")
+            return version
+    return None
+
+
+def detecter_format(lignes):
+    """Renvoie le ``FormatRHS`` de la première ligne non vide, ou None si sa version est inconnue."""
+    return FORMATS_RHS.get(lire_version(lignes))
+
+
+def _matrice_partie_fixe(lignes, largeur):
+    """Matrice des ``largeur`` premiers octets de chaque ligne (toutes au moins aussi longues)."""
+    return np.array([ligne[:largeur] for ligne in lignes], dtype=f"S{largeur}").view(np.uint8).reshape(len(lignes), -1)
+
+
+def _zones(nombres, debuts, longueur, longueurs):
+    """Ligne et position des zones variables : ``nombres[i]`` zones consécutives de ``longueur``
+    octets à partir de ``debuts[i]`` sur la ligne ``i``, dans l'ordre du fichier.
+
+    Les zones qui dépassent la fin de leur ligne sont écartées.
+    """
+    lignes = np.repeat(np.arange(len(nombres)), nombres)
+    rangs = np.arange(len(lignes)) - np.repeat(np.cumsum(nombres) - nombres, nombres)
+    positions = debuts[lignes] + rangs * longueur
+    completes = positions + longueur <= longueurs[lignes]
+    return lignes[completes], positions[completes]
+
+
+def _extraire_octets(octets, debuts_lignes, lignes_idx, positions, longueur):
+    """Blocs de ``longueur`` octets débutant à ``positions`` sur les lignes ``lignes_idx``.
+
+    ``octets`` contient toutes les lignes bout à bout, la ligne ``i`` commençant à ``debuts_lignes[i]``.
+    """
+    return octets[(debuts_lignes[lignes_idx] + positions)[:, None] + np.arange(longueur)]
+
+
+def _texte(bloc):
+    valeurs = np.ascontiguousarray(bloc).view(f"S{bloc.shape[1]}").ravel()
+    # Les codes se répètent beaucoup : seules les valeurs distinctes sont décodées
+    distinctes, inverse = np.unique(valeurs, return_inverse=True)
+    textes = np.array([v.decode("latin-1").strip() for v in distinctes], dtype=object)
+    return pd.Series(textes[inverse.ravel()], dtype="str")
+
+
+def _entier(bloc):
+    chiffres = bloc.astype(np.int64) - ord("0")
+    valides = ((chiffres >= 0) & (chiffres <= 9)).all(axis=1)
+    puissances = 10 ** np.arange(bloc.shape[1] - 1, -1, -1)
+    return np.where(valides, chiffres @ puissances, 0)
+
+
+def _date(bloc):
+    """Convertit des blocs JJMMAAAA en datetime64 ; les blocs vides ou invalides donnent NaT."""
+    chiffres = bloc.astype(np.int64) - ord("0")
+    valides = ((chiffres >= 0) & (chiffres <= 9)).all(axis=1)
+    composantes = {
+        "year": chiffres[:, 4] * 1000 + chiffres[:, 5] * 100 + chiffres[:, 6] * 10 + chiffres[:, 7],
+        "month": chiffres[:, 2] * 10 + chiffres[:, 3],
+        "day": chiffres[:, 0] * 10 + chiffres[:, 1],
+    }
+    return pd.to_datetime(
+        pd.DataFrame({nom: np.where(valides, valeurs, np.nan) for nom, valeurs in composantes.items()}),
+        errors="coerce",
+    )
+
+
+def decoder_largeur_fixe(lignes, format_rhs: FormatRHS, premier_id_ligne=0):
+    """Décode des enregistrements RHS (``bytes``) en trois DataFrames : séjours, actes et diagnostics.
+
+    Les lignes d'une autre version ou trop courtes pour contenir la partie fixe sont ignorées.
+    """
+    champs = format_rhs.champs
+    debut_version, longueur_version = POSITION_VERSION
+    version = format_rhs.version.encode("latin-1")
+    retenues = np.array([
+        i for i, ligne in enumerate(lignes)
+        if len(ligne) >= format_rhs.debut_zone_variable
+        and ligne[debut_version:debut_version + longueur_version] == version
+    ], dtype=np.int64)
+    lignes = [lignes[i] for i in retenues]
+    id_lignes = retenues + premier_id_ligne
+    if not lignes:
+        return table_vide("sejours"), table_vide("actes"), table_vide("diagnostics")
+
+    matrice = _matrice_partie_fixe(lignes, format_rhs.debut_zone_variable)
+    longueurs = np.array([len(ligne) for ligne in lignes], dtype=np.int64)
+    octets = np.frombuffer(b"".join(lignes), dtype=np.uint8)
+    debuts_lignes = np.cumsum(longueurs) - longueurs
+
+    def champ(nom):
+        debut, longueur = champs[nom]
+        return matrice[:, debut:debut + longueur]
+
+    sejours = pd.DataFrame({
+        "id_ligne": id_lignes,
+        "identifiant": _texte(champ("num_sejour")).replace("", None),
+        "date_entree": _date(champ("date_entree")),
+        "date_sortie": _date(champ("date_sortie")),
+        "date_naissance": _date(champ("date_naissance")),
+    })
+
+    # Diagnostics : ceux de la partie fixe, puis les diagnostics associés de la zone variable
+    diagnostics = []
+    for nom, type_diagnostic in DIAGNOSTICS_PARTIE_FIXE.items():
+        diagnostics.append(pd.DataFrame({
+            "id_ligne": id_lignes,
+            "diagnostic": _texte(champ(nom)),
+            "type_diagnostic": type_diagnostic,
+        }))
+
+    nb_diagnostics = _entier(champ("nb_diagnostics_associes"))
+    nb_ccam = _entier(champ("nb_actes_ccam"))
+    nb_csarr = _entier(champ("nb_actes_csarr"))
+    debut_diagnostics = np.full(len(lignes), format_rhs.debut_zone_variable)
+    debut_csarr = (
+        debut_diagnostics
+        + nb_diagnostics * format_rhs.longueur_diagnostic
+        + nb_ccam * format_rhs.longueur_acte_ccam
+    )
+
+    idx, positions = _zones(nb_diagnostics, debut_diagnostics, format_rhs.longueur_diagnostic, longueurs)
+    diagnostics.append(pd.DataFrame({
+        "id_ligne": id_lignes[idx],
+        "diagnostic": _texte(_extraire_octets(octets, debuts_lignes, idx, positions, format_rhs.longueur_diagnostic)),
+        "type_diagnostic": "DA",
+    }))
+
+    # Actes CSARR : une zone de longueur fixe par acte, à la suite des actes CCAM, déjà dans l'ordre du fichier
+    debut_code, longueur_code = format_rhs.champs_acte_csarr["code"]
+    debut_date, longueur_date = format_rhs.champs_acte_csarr["date_realisation"]
+    idx, positions = _zones(nb_csarr, debut_csarr, format_rhs.longueur_acte_csarr, longueurs)
+    df_actes = concatener([pd.DataFrame({
+        "id_ligne": id_lignes[idx],
+        "identifiant": sejours["identifiant"].to_numpy()[idx],
+        "code_csarr": _texte(_extraire_octets(octets, debuts_lignes, idx, positions + debut_code, longueur_code)),
+        "date_acte": _date(_extraire_octets(octets, debuts_lignes, idx, positions + debut_date, longueur_date)),
+    })], "actes")
+
+    df_diagnostics = concatener(diagnostics, "diagnostics")
+    df_diagnostics = df_diagnostics[df_diagnostics["diagnostic"] != ""]
+    df_diagnostics = df_diagnostics.sort_values("id_ligne", kind="stable").reset_index(drop=True)
+
+    return sejours, df_actes, df_diagnostics
+
+
@@ -0,0 +1,161 @@
+"""Construction des figures Plotly des pages d'analyse.
+
+Les séries sont découpées en une seule passe (``groupby``) et non par un filtre
+booléen par valeur ; pour les grands volumes, seules les données affichées sont
+envoyées au navigateur, avec un rendu WebGL (``Scattergl``). Les distributions
+sont résumées côté serveur : le navigateur ne reçoit que les effectifs des
+classes d'un histogramme et les statistiques d'une boîte à moustaches.
+"""
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+JOURS_SEMAINE = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+
+# Au-delà de ce nombre de points, les nuages sont rendus en WebGL
+SEUIL_WEBGL = 5000
+# Jusqu'à ce nombre de valeurs, les boîtes à moustaches affichent aussi chaque point
+SEUIL_POINTS = int(os.environ.get("RHS_SEUIL_POINTS", "2000"))
+
+
+def _menu(buttons):
+    return dict(type="dropdown", showactive=True, buttons=buttons, x=0.0, xanchor="left", y=1.15, yanchor="top")
+
+
+def figure_actes_par_jour(df_global):
+    """Actes par jour, filtrables par mois ou par jour de la semaine via un menu déroulant.
+
+    Une barre par case mois × jour de la semaine est construite en une seule passe :
+    chaque date n'est envoyée qu'une fois et le menu ne fait que basculer la
+    visibilité des cases de la ligne (mois) ou de la colonne (jour) choisie.
+    """
+    mois = df_global["date_acte"].dt.to_period("M").rename("mois")
+    jours = df_global["date_acte"].dt.dayofweek.rename("jour")
+    mois_uniques = sorted(mois.unique())
+    couleurs = qualitative.Plotly
+
+    fig = go.Figure()
+    cases = []
+    for (m, j), data_case in df_global.groupby([mois, jours], sort=True):
+        rang_mois = mois_uniques.index(m)
+        fig.add_trace(go.Bar(
+            x=data_case["date_acte"], y=data_case["nb_actes"], name=f"Mois {m}",
+            legendgroup=str(m), showlegend=not any(c[0] == m for c in cases),
+            marker_color=couleurs[rang_mois % len(couleurs)], visible=rang_mois == 0,
+        ))
+        cases.append((m, j))
+
+    buttons = [dict(label="Tous les mois", method="update",
+                    args=[{"visible": [True] * len(cases)}, {"title": "Nombre d’actes CSARR par jour"}])]
+    for m in mois_uniques:
+        buttons.append(dict(label=f"Mois : {m}", method="update",
+                            args=[{"visible": [c[0] == m for c in cases]}, {"title": f"Nombre d’actes CSARR - {m}"}]))
+    for j in sorted(set(c[1] for c in cases)):
+        buttons.append(dict(label=f"Jour : {JOURS_SEMAINE[j]}", method="update",
+                            args=[{"visible": [c[1] == j for c in cases]},
+                                  {"title": f"Nombre d’actes CSARR - {JOURS_SEMAINE[j]}"}]))
+
+    fig.update_layout(updatemenus=[_menu(buttons)], barmode="stack",
+                      transition=dict(duration=500, easing="cubic-in-out"))
+    return fig
+
+
+def figure_actes_patients_menu(df_summary):
+    """Une courbe par patient, choisie par menu déroulant : réservé aux petits effectifs."""
+    fig = go.Figure()
+    series = df_summary.groupby("patient_id", sort=False, observed=True)
+    patients = list(series.groups)
+    for i, (pid, data_patient) in enumerate(series):
+        fig.add_trace(go.Scatter(x=data_patient["date_acte"], y=data_patient["nb_actes"],
+                                 mode="lines+markers", name=str(pid), visible=i == 0))
+
+    buttons = [dict(label="Tous", method="update",
+                    args=[{"visible": [True] * len(patients)}, {"title": "Nombre d’actes CSARR par jour par patient"}])]
+    for i, pid in enumerate(patients):
+        visibility = [j == i for j in range(len(patients))]
+        buttons.append(dict(label=f"{pid}", method="update",
+                            args=[{"visible": visibility}, {"title": f"Nombre d’actes CSARR - {pid}"}]))
+
+    fig.update_layout(updatemenus=[_menu(buttons)], transition=dict(duration=500, easing="cubic-in-out"))
+    return fig
+
+
+def figure_actes_patient(df_summary, indices_par_patient, patient=None):
+    """Actes par jour d'un seul patient, ou de tous les patients en un seul nuage de points.
+
+    ``indices_par_patient`` est le résultat de ``df_summary.groupby("patient_id", observed=True).indices``,
+    calculé une fois : la série d'un patient est alors lue sans refiltrer la table.
+    """
+    if patient is None:
+        trace = go.Scattergl if len(df_summary) > SEUIL_WEBGL else go.Scatter
+        fig = go.Figure(trace(
+            x=df_summary["date_acte"], y=df_summary["nb_actes"], mode="markers",
+            text=df_summary["patient_id"], hovertemplate="%{text}<br>%{x|%Y-%m-%d} : %{y} acte(s)<extra></extra>",
+            marker=dict(size=4, opacity=0.5),
+        ))
+        fig.update_layout(title="Nombre d’actes CSARR par jour par patient")
+        return fig
+
+    data_patient = df_summary.iloc[indices_par_patient[patient]]
+    trace = go.Scattergl if len(data_patient) > SEUIL_WEBGL else go.Scatter
+    fig = go.Figure(trace(x=data_patient["date_acte"], y=data_patient["nb_actes"],
+                          mode="lines+markers", name=str(patient)))
+    fig.update_layout(title=f"Nombre d’actes CSARR - {patient}")
+    return fig
+
+
+def _valeurs(serie):
+    valeurs = np.asarray(serie, dtype=float)
+    return valeurs[~np.isnan(valeurs)]
+
+
+def figure_histogramme(serie, nb_classes=30, titre=None, libelle_x=None, libelle_y="Effectif"):
+    """Histogramme calculé avec ``np.histogram`` : seuls les effectifs des classes sont envoyés.
+
+    Pour des valeurs entières, les classes sont centrées sur des entiers, comme le
+    ferait Plotly, plutôt que découpées en intervalles fractionnaires.
+    """
+    valeurs = _valeurs(serie)
+    if len(valeurs) and np.all(valeurs == np.round(valeurs)):
+        largeur = max(1, int(np.ceil((valeurs.max() - valeurs.min() + 1) / nb_classes)))
+        bornes = np.arange(valeurs.min(), valeurs.max() + largeur + 1, largeur) - 0.5
+    else:
+        bornes = nb_classes
+    comptes, bornes = np.histogram(valeurs, bins=bornes)
+
+    fig = go.Figure(go.Bar(
+        x=(bornes[:-1] + bornes[1:]) / 2, y=comptes, width=np.diff(bornes),
+        customdata=np.column_stack([bornes[:-1], bornes[1:]]),
+        hovertemplate="[%{customdata[0]:.4g} ; %{customdata[1]:.4g}[ : %{y}<extra></extra>",
+    ))
+    fig.update_layout(title=titre, xaxis_title=libelle_x, yaxis_title=libelle_y, bargap=0)
+    return fig
+
+
+def resume_boite(serie) -> dict:
+    """Quartiles, moyenne et moustaches (1,5 écart interquartile, bornées aux valeurs observées)."""
+    valeurs = _valeurs(serie)
+    if not len(valeurs):
+        return {}
+    q1, mediane, q3 = np.percentile(valeurs, [25, 50, 75])
+    ecart = q3 - q1
+    return {
+        "q1": q1, "median": mediane, "q3": q3, "mean": valeurs.mean(),
+        "lowerfence": valeurs[valeurs >= q1 - 1.5 * ecart].min(),
+        "upperfence": valeurs[valeurs <= q3 + 1.5 * ecart].max(),
+    }
+
+
+def figure_boite(serie, libelle, seuil_points=SEUIL_POINTS):
+    """Boîte à moustaches d'une série : tous les points jusqu'à ``seuil_points`` valeurs,
+    au-delà seulement les statistiques calculées côté serveur (``resume_boite``)."""
+    valeurs = _valeurs(serie)
+    if len(valeurs) <= seuil_points:
+        trace = go.Box(y=valeurs, boxpoints="all", boxmean=True, name=libelle)
+    else:
+        trace = go.Box(**{k: [v] for k, v in resume_boite(valeurs).items()}, x=[libelle], boxmean=True, name=libelle)
+    fig = go.Figure(trace)
+    fig.update_layout(yaxis_title=libelle, showlegend=False)
+    return fig
@@ -0,0 +1,42 @@
+"""Illustrations affichées en tête des pages, lues une seule fois par processus.
+
+Chaque image de ``assets/`` est lue, réduite au besoin à ``LARGEUR_MAX`` pixels
+puis gardée en mémoire : les exécutions suivantes des pages, dans toutes les
+sessions, l'envoient sans relire ni décoder le fichier. ``RHS_ILLUSTRATIONS=0``
+supprime les illustrations, par exemple sur un serveur où seul compte le temps
+d'affichage.
+"""
+import functools
+import io
+import os
+from pathlib import Path
+
+import streamlit as st
+
+DOSSIER_ASSETS = Path(__file__).resolve().parent.parent / "assets"
+ACTIVES = os.environ.get("RHS_ILLUSTRATIONS", "1") not in ("", "0")
+# Largeur au-delà de laquelle l'image est réduite (la colonne centrale d'une page en fait 704)
+LARGEUR_MAX = int(os.environ.get("RHS_ILLUSTRATIONS_LARGEUR", "704"))
+
+
+@functools.lru_cache(maxsize=None)
+def image_reduite(nom: str, largeur_max: int = LARGEUR_MAX) -> bytes:
+    """Contenu de ``assets/<nom>``, réencodé à ``largeur_max`` pixels de large s'il les dépasse."""
+    contenu = (DOSSIER_ASSETS / nom).read_bytes()
+    from PIL import Image
+
+    with Image.open(io.BytesIO(contenu)) as image:
+        if image.width <= largeur_max:
+            return contenu
+        format_image = image.format
+        image = image.resize((largeur_max, round(image.height * largeur_max / image.width)), Image.LANCZOS)
+        sortie = io.BytesIO()
+        image.save(sortie, format=format_image, quality=85, optimize=True)
+    return sortie.getvalue()
+
+
+def afficher_illustration(nom: str, legende: str):
+    """Image d'en-tête ``assets/<nom>`` sur toute la largeur, sauf si les illustrations sont désactivées."""
+    if not ACTIVES:
+        return
+    st.image(image_reduite(nom), caption=legende, width="stretch")
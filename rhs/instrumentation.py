@@ -0,0 +1,127 @@
+"""Mesure de la durée et de la mémoire des étapes d'affichage d'une page.
+
+Désactivée par défaut : ``RHS_INSTRUMENTATION=1`` l'active. Chaque page découpe
+alors son exécution en étapes nommées (``analyse``, ``derivation``, ``agregation``,
+``rendu``, ``export``) dont la durée et le pic de mémoire allouée (``tracemalloc``,
+qui ralentit sensiblement les calculs mesurés) sont affichés dans un panneau de
+la barre latérale, avec l'écart à l'exécution précédente de la même page. Si
+``RHS_JOURNAL_MESURES`` désigne un fichier, chaque exécution y est ajoutée sous
+forme d'une ligne JSON, pour comparer les exécutions ou repérer les fichiers
+pathologiques.
+
+``tracemalloc`` suit tout le processus, alors que les mesures sont propres à
+chaque session : pour que le pic d'une étape ne compte pas celles d'une autre
+session, les étapes mesurées de toutes les sessions s'exécutent l'une après
+l'autre (``_VERROU_ETAPES``). Le pic compte encore les allocations faites au
+même moment par un code non mesuré (une page sans étape, le serveur) ; et tant
+que l'instrumentation est active, les sessions attendent leur tour.
+
+Instrumentation désactivée, les étapes ne coûtent rien et le panneau n'apparaît pas ;
+pandas, qui sert au seul panneau, n'est alors pas importé par ce module.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+ACTIVE = os.environ.get("RHS_INSTRUMENTATION", "0") not in ("", "0")
+JOURNAL = os.environ.get("RHS_JOURNAL_MESURES")
+
+ETAPES = ("analyse", "derivation", "agregation", "rendu", "export")
+# Une seule étape mesurée à la fois dans le processus (voir plus haut)
+_VERROU_ETAPES = threading.RLock()
+
+
+class Instrumentation:
+    """Durées et pics de mémoire des étapes d'une exécution de page, cumulés par nom d'étape.
+
+    Les étapes ne s'imbriquent pas : une étape ouverte à l'intérieur d'une autre
+    est comptée dans celle qui l'englobe.
+    """
+
+    def __init__(self, page: str, active: bool = ACTIVE):
+        self.page = page
+        self.active = active
+        self.mesures = {}
+        self._en_cours = False
+        if active and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def etape(self, nom: str):
+        if not self.active or self._en_cours:
+            yield
+            return
+        with _VERROU_ETAPES:
+            self._en_cours = True
+            tracemalloc.reset_peak()
+            memoire_debut = tracemalloc.get_traced_memory()[0]
+            debut = time.perf_counter()
+            try:
+                yield
+            finally:
+                secondes = time.perf_counter() - debut
+                pic = (tracemalloc.get_traced_memory()[1] - memoire_debut) / 2 ** 20
+                cumul = self.mesures.setdefault(nom, {"secondes": 0.0, "memoire_mo": 0.0})
+                cumul["secondes"] += secondes
+                cumul["memoire_mo"] = max(cumul["memoire_mo"], pic)
+                self._en_cours = False
+
+    def tableau(self):
+        """DataFrame d'une ligne par étape, dans l'ordre de ``ETAPES`` puis d'apparition."""
+        import pandas as pd
+
+        noms = [n for n in ETAPES if n in self.mesures] + [n for n in self.mesures if n not in ETAPES]
+        return pd.DataFrame(
+            [(n, round(self.mesures[n]["secondes"], 3), round(self.mesures[n]["memoire_mo"], 1)) for n in noms],
+            columns=["etape", "secondes", "memoire_mo"],
+        )
+
+    def journaliser(self, chemin, empreinte=None):
+        """Ajoute les mesures de cette exécution à ``chemin`` (une ligne JSON par exécution)."""
+        ligne = {
+            "horodatage": datetime.now().isoformat(timespec="seconds"),
+            "page": self.page,
+            "empreinte": empreinte,
+            "etapes": {n: {k: round(v, 4) for k, v in m.items()} for n, m in self.mesures.items()},
+            "total_secondes": round(sum(m["secondes"] for m in self.mesures.values()), 4),
+        }
+        with open(chemin, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+
+
+def instrumentation_de_page(etat, page: str) -> Instrumentation:
+    """Nouvelle instrumentation pour cette exécution de ``page``, retrouvée ensuite par ``etape``."""
+    instrumentation = etat["instrumentation"] = Instrumentation(page)
+    return instrumentation
+
+
+def etape(etat, nom: str):
+    """Étape ``nom`` de l'instrumentation de la page en cours (sans effet si aucune n'est active)."""
+    instrumentation = etat.get("instrumentation")
+    if instrumentation is None:
+        return Instrumentation("", active=False).etape(nom)
+    return instrumentation.etape(nom)
+
+
+def afficher_mesures(instrumentation: Instrumentation, etat):
+    """Panneau des mesures dans la barre latérale, et ligne du journal si ``RHS_JOURNAL_MESURES`` est défini."""
+    if not instrumentation.active:
+        return
+    df = instrumentation.tableau()
+    cle_precedente = f"instrumentation:{instrumentation.page}"
+    precedente = etat.get(cle_precedente)
+    if precedente is not None:
+        df["ecart_s"] = (df["secondes"] - df["etape"].map(precedente).fillna(0)).round(3)
+    etat[cle_precedente] = dict(zip(df["etape"], df["secondes"]))
+
+    with st.sidebar.expander("⏱️ Mesures de cette page", expanded=True):
+        st.dataframe(df, hide_index=True, width="stretch")
+        st.caption(f"Total : {df['secondes'].sum():.2f} s")
+    if JOURNAL:
+        instrumentation.journaliser(JOURNAL, etat.get("rhs_empreinte"))
@@ -0,0 +1,40 @@
+"""Tableaux paginés côté serveur : recherche, tri et découpage en pages.
+
+La recherche et le tri portent sur les colonnes compactes de la table entière ;
+seule la page courante est ensuite mise en forme et envoyée au navigateur.
+"""
+import math
+
+import streamlit as st
+
+TAILLES_PAGE = (25, 50, 100, 200)
+
+
+def paginer(df, cle, colonnes_tri: dict, rechercher=None, libelle_recherche="Rechercher :"):
+    """Affiche les contrôles du tableau ``cle`` et renvoie ``(lignes filtrées et triées, page courante)``.
+
+    ``colonnes_tri`` associe un libellé à la colonne de tri (``None`` : ordre du
+    tableau) ; ``rechercher(df, texte)`` renvoie le masque des lignes retenues.
+    """
+    colonne_recherche, colonne_tri, colonne_sens = st.columns([3, 3, 2])
+    texte = colonne_recherche.text_input(libelle_recherche, key=f"{cle}:recherche").strip()
+    libelle_tri = colonne_tri.selectbox("Trier par :", list(colonnes_tri), key=f"{cle}:tri")
+    decroissant = colonne_sens.toggle("Ordre décroissant", key=f"{cle}:decroissant")
+
+    if texte and rechercher is not None:
+        df = df[rechercher(df, texte)]
+    colonne = colonnes_tri[libelle_tri]
+    if colonne is not None:
+        df = df.sort_values(colonne, ascending=not decroissant, kind="stable", na_position="last")
+    elif decroissant:
+        df = df.iloc[::-1]
+
+    colonne_taille, colonne_page, colonne_total = st.columns([2, 2, 4])
+    taille_page = colonne_taille.selectbox("Lignes par page :", TAILLES_PAGE, index=1, key=f"{cle}:taille")
+    nb_pages = max(1, math.ceil(len(df) / taille_page))
+    # La page retenue peut ne plus exister après un filtrage : elle est ramenée à la dernière
+    st.session_state[f"{cle}:page"] = min(st.session_state.get(f"{cle}:page", 1), nb_pages)
+    page = colonne_page.number_input("Page :", min_value=1, max_value=nb_pages, key=f"{cle}:page")
+    colonne_total.caption(f"{len(df)} ligne(s), page {page} sur {nb_pages}")
+
+    return df, df.iloc[(page - 1) * taille_page:page * taille_page]
@@ -0,0 +1,229 @@
+"""Lecture d'un fichier RHS en tables typées (séjours, actes, diagnostics).
+
+Le fichier n'est parcouru qu'une seule fois, au moment de l'import depuis la
+page d'accueil ; les pages d'analyse lisent ensuite directement les tables.
+
+Les fichiers dont la version de format ATIH est connue sont découpés à positions
+fixes (voir ``rhs.formats``) ; les autres sont analysés par expressions régulières.
+"""
+import collections
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from rhs.formats import FORMATS_RHS, concatener, decoder_largeur_fixe, lire_version, typer
+from rhs.sejours import regrouper_enregistrements, selon_sejour
+
+MOTIF_PATIENT = re.compile(r"\b(\d{8})\b")
+# Bloc de 24 chiffres : date d'entrée, date de sortie (vide si hospitalisation en cours), date de naissance
+MOTIF_DATES = re.compile(r"(\d{8})(\d{8}| {8})(\d{8})")
+MOTIF_ACTE = re.compile(r"[A-Z]{3}(?:\+\d{3}|\d{3})")
+# Acte suivi de son bloc de 14 chiffres, dont la date de réalisation (JJMMAAAA) en positions 2 à 10
+MOTIF_ACTE_DATE = re.compile(r"([A-Z]{3}\+\d{3})\s+(?:[A-Z0-9]+\s+)?(\d{14})")
+MOTIF_DIAGNOSTIC = re.compile(r"[A-Z]\d{2}\.?\d*")
+
+# Taille des blocs lus lors de l'import, pour ne jamais garder le fichier décodé en mémoire
+TAILLE_BLOC = 8 * 1024 * 1024
+# Nombre de processus analysant les blocs d'un même fichier (1 : analyse dans le processus courant)
+PROCESSUS_ANALYSE = int(os.environ.get("RHS_PROCESSUS_ANALYSE", os.cpu_count() or 1))
+
+
+@dataclass
+class DonneesRHS:
+    """Tables issues d'un fichier RHS.
+
+    - ``sejours`` : une ligne par séjour, identifié par son identifiant et sa date d'entrée
+      (``id_ligne``, ``identifiant``, ``date_entree``, ``date_sortie``, ``date_naissance``),
+      ``id_ligne`` étant la ligne de son premier enregistrement RHS hebdomadaire ;
+    - ``actes`` : un acte CSARR par ligne (``id_ligne``, ``identifiant``, ``code_csarr``, ``date_acte``,
+      ``id_sejour``), ``identifiant`` étant reporté depuis le dernier patient rencontré, et stocké en catégories ;
+    - ``diagnostics`` : un code CIM-10 par ligne (``id_ligne``, ``diagnostic``, ``type_diagnostic``,
+      ``id_sejour``), le type (FPP, MMP, AE ou DA) n'étant connu que pour les fichiers à positions fixes.
+
+    ``id_sejour`` est l'``id_ligne`` du séjour de l'enregistrement qui porte l'acte
+    ou le diagnostic (ou qui le précède dans le fichier), -1 si aucun ne le précède.
+
+    ``version_non_reconnue`` est la version de format lue dans un fichier dont le
+    format n'est pas pris en charge, analysé alors par expressions régulières.
+    """
+
+    sejours: pd.DataFrame
+    actes: pd.DataFrame
+    diagnostics: pd.DataFrame
+    version_non_reconnue: str | None = None
+
+    def __post_init__(self):
+        # Un code entier par acte plutôt qu'une chaîne : les identifiants se répètent sur tous les actes d'un patient
+        if not isinstance(self.actes["identifiant"].dtype, pd.CategoricalDtype):
+            self.actes["identifiant"] = self.actes["identifiant"].astype("category")
+
+    def taille_octets(self) -> int:
+        return sum(
+            int(table.memory_usage(deep=True).sum())
+            for table in (self.sejours, self.actes, self.diagnostics)
+        )
+
+
+def lire_fichier_rhs(fichier, taille_bloc=TAILLE_BLOC, processus=PROCESSUS_ANALYSE) -> DonneesRHS:
+    """Analyse un fichier RHS ouvert en binaire, par blocs de ``taille_bloc`` octets.
+
+    Le contenu n'est jamais décodé en entier : chaque bloc, coupé sur une fin de
+    ligne, est analysé puis libéré, et seules les tables obtenues sont conservées.
+    Dès que le fichier compte plusieurs blocs, ceux-ci sont répartis sur
+    ``processus`` processus ; les tables des blocs sont ensuite raccordées dans
+    l'ordre du fichier (voir ``_raccorder``). Les processus étant lancés en mode
+    ``spawn``, un script appelant doit protéger son point d'entrée
+    (``if __name__ == "__main__"``).
+    """
+    blocs = _blocs_de_lignes(fichier, taille_bloc)
+    premiers = list(itertools.islice(blocs, 2))
+    if not premiers:
+        return _regrouper(*_analyser_lignes([], 0, None)[:3])
+    version = lire_version(premiers[0].splitlines())
+    format_rhs = FORMATS_RHS.get(version)
+    blocs = itertools.chain(premiers, blocs)
+
+    if processus > 1 and len(premiers) > 1:
+        with ProcessPoolExecutor(max_workers=processus, mp_context=multiprocessing.get_context("spawn")) as pool:
+            donnees = _raccorder(_analyser_en_parallele(pool, blocs, format_rhs, processus), format_rhs)
+    else:
+        donnees = _raccorder((_analyser_bloc(bloc, format_rhs) for bloc in blocs), format_rhs)
+    if format_rhs is None:
+        donnees.version_non_reconnue = version
+    return donnees
+
+
+def _blocs_de_lignes(fichier, taille_bloc):
+    """Lit ``fichier`` par blocs, chacun se terminant sur une fin de ligne complète."""
+    reste = b""
+    while True:
+        bloc = fichier.read(taille_bloc)
+        if not bloc:
+            break
+        bloc = reste + bloc
+        coupure = bloc.rfind(b"\n") + 1
+        if coupure == 0:
+            reste = bloc
+            continue
+        reste = bloc[coupure:]
+        yield bloc[:coupure]
+    if reste:
+        yield reste
+
+
+def _analyser_bloc(bloc, format_rhs):
+    """Tables d'un bloc, ``id_ligne`` comptés depuis le début du bloc, et son nombre de lignes.
+
+    Le dernier patient rencontré est aussi renvoyé : les actes du bloc précédant sa
+    première ligne patient (``identifiant`` manquant) seront rattachés à celui du bloc précédent.
+    """
+    if format_rhs is not None:
+        lignes = bloc.splitlines()
+        return (*decoder_largeur_fixe(lignes, format_rhs), len(lignes), None)
+    lignes = bloc.decode("utf-8").splitlines()
+    sejours, actes, diagnostics, dernier_patient = _analyser_lignes(lignes, 0, None)
+    return sejours, actes, diagnostics, len(lignes), dernier_patient
+
+
+def _analyser_en_parallele(pool, blocs, format_rhs, processus):
+    """Résultats de ``_analyser_bloc`` dans l'ordre des blocs, au plus ``2 × processus`` blocs en cours."""
+    en_cours = collections.deque()
+    for bloc in blocs:
+        en_cours.append(pool.submit(_analyser_bloc, bloc, format_rhs))
+        if len(en_cours) >= 2 * processus:
+            yield en_cours.popleft().result()
+    while en_cours:
+        yield en_cours.popleft().result()
+
+
+def _raccorder(resultats, format_rhs) -> DonneesRHS:
+    """Assemble les tables des blocs : numéros de ligne décalés, dernier patient reporté d'un bloc à l'autre."""
+    morceaux = []
+    premier_id_ligne = 0
+    dernier_patient = None
+    for sejours, actes, diagnostics, nb_lignes, dernier_patient_bloc in resultats:
+        for table in (sejours, actes, diagnostics):
+            table["id_ligne"] += premier_id_ligne
+        if format_rhs is None and dernier_patient is not None:
+            actes["identifiant"] = actes["identifiant"].fillna(dernier_patient)
+        morceaux.append((sejours, actes, diagnostics))
+        premier_id_ligne += nb_lignes
+        dernier_patient = dernier_patient_bloc or dernier_patient
+
+    return _regrouper(*(concatener([m[i] for m in morceaux]) for i in range(3)))
+
+
+def _regrouper(sejours, actes, diagnostics) -> DonneesRHS:
+    """Tables par séjour à partir des enregistrements RHS, une fois tout le fichier lu.
+
+    Les enregistrements hebdomadaires d'un même séjour (même identifiant et même
+    date d'entrée, comme pour le corpus), consécutifs ou non, forment une seule
+    ligne de ``sejours`` ; ceux dont l'identifiant ou la date d'entrée manque
+    restent seuls. Chaque acte et diagnostic reçoit l'``id_sejour`` du séjour
+    de l'enregistrement qui le précède (ou qui le porte).
+    """
+    premiers = sejours.groupby(["identifiant", "date_entree"])["id_ligne"].transform("min")
+    premiers = premiers.fillna(sejours["id_ligne"]).astype("int64").to_numpy()
+    id_lignes = sejours["id_ligne"].to_numpy()
+    for table in (actes, diagnostics):
+        positions = np.searchsorted(id_lignes, table["id_ligne"].to_numpy(), side="right") - 1
+        table["id_sejour"] = selon_sejour(premiers, positions, np.int64(-1))
+    return DonneesRHS(sejours=regrouper_enregistrements(sejours, premiers), actes=actes, diagnostics=diagnostics)
+
+
+def _analyser_lignes(lignes, premier_id_ligne, dernier_patient):
+    """Analyse regex d'un bloc de lignes ; ``dernier_patient`` est reporté d'un bloc à l'autre."""
+    sejours = {"id_ligne": [], "identifiant": [], "date_entree": [], "date_sortie": [], "date_naissance": []}
+    actes = {"id_ligne": [], "identifiant": [], "code_csarr": [], "date_acte": []}
+    diagnostics = {"id_ligne": [], "diagnostic": [], "type_diagnostic": []}
+
+    for id_ligne, ligne in enumerate(lignes, start=premier_id_ligne):
+        match_patient = MOTIF_PATIENT.search(ligne)
+        identifiant = match_patient.group(1) if match_patient else None
+        if identifiant:
+            dernier_patient = identifiant
+
+        match_dates = MOTIF_DATES.search(ligne)
+        if match_dates:
+            sejours["id_ligne"].append(id_ligne)
+            sejours["identifiant"].append(identifiant)
+            sejours["date_entree"].append(match_dates.group(1))
+            sejours["date_sortie"].append(match_dates.group(2).strip() or None)
+            sejours["date_naissance"].append(match_dates.group(3))
+
+        # Date de réalisation indexée par la position du code de l'acte dans la ligne
+        dates_actes = {m.start(1): m.group(2)[2:10] for m in MOTIF_ACTE_DATE.finditer(ligne)}
+        for match_acte in MOTIF_ACTE.finditer(ligne):
+            actes["id_ligne"].append(id_ligne)
+            actes["identifiant"].append(dernier_patient)
+            actes["code_csarr"].append(match_acte.group(0))
+            actes["date_acte"].append(dates_actes.pop(match_acte.start(), None))
+        for debut, date_acte in dates_actes.items():
+            actes["id_ligne"].append(id_ligne)
+            actes["identifiant"].append(dernier_patient)
+            actes["code_csarr"].append(MOTIF_ACTE_DATE.match(ligne, debut).group(1))
+            actes["date_acte"].append(date_acte)
+
+        for diagnostic in MOTIF_DIAGNOSTIC.findall(ligne):
+            diagnostics["id_ligne"].append(id_ligne)
+            diagnostics["diagnostic"].append(diagnostic)
+            diagnostics["type_diagnostic"].append(None)
+
+    df_sejours = pd.DataFrame(sejours)
+    for colonne in ("date_entree", "date_sortie", "date_naissance"):
+        df_sejours[colonne] = pd.to_datetime(df_sejours[colonne], format="%d%m%Y", errors="coerce")
+
+    df_actes = pd.DataFrame(actes)
+    df_actes["date_acte"] = pd.to_datetime(df_actes["date_acte"], format="%d%m%Y", errors="coerce")
+
+    # Mêmes types qu'à positions fixes, y compris pour un bloc sans séjour, sans acte ou sans diagnostic
+    return (
+        typer(df_sejours, "sejours"), typer(df_actes, "actes"), typer(pd.DataFrame(diagnostics), "diagnostics"),
+        dernier_patient,
+    )
@@ -0,0 +1,100 @@
+"""Restriction des données importées à une période, partagée par toutes les pages.
+
+Les actes et les séjours sont indexés une fois par fichier, triés par date
+(``IndexDates``) : restreindre les données à une période revient à deux
+recherches dichotomiques (``searchsorted``) dans ces index, sans parcourir les
+tables entières. Les tables dérivées sont ensuite recalculées sur l'extrait
+seul (voir ``rhs.tables.tables_de_session``).
+
+Sont retenus pour une période [début, fin] :
+
+- les séjours qui la chevauchent (entrée avant la fin, sortie après le début ou
+  hospitalisation en cours) et leurs diagnostics ;
+- les actes datés de la période, s'ils ne sont pas rattachés à un séjour écarté.
+"""
+import numpy as np
+import pandas as pd
+
+from rhs.parsing import DonneesRHS
+from rhs.sejours import positions_sejours
+
+
+def _borne(jour, dates: np.ndarray) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(jour)).astype(dates.dtype)
+
+
+class IndexDates:
+    """Ordres de tri par date des séjours (date d'entrée) et des actes d'un ``DonneesRHS``."""
+
+    def __init__(self, donnees: DonneesRHS):
+        self.donnees = donnees
+        entrees = donnees.sejours["date_entree"].to_numpy()
+        dates_actes = donnees.actes["date_acte"].to_numpy()
+        # Les dates manquantes (NaT) sont rangées à la fin et ne tombent dans aucune période
+        self.ordre_sejours = np.argsort(entrees, kind="stable")
+        self.entrees_triees = entrees[self.ordre_sejours]
+        self.ordre_actes = np.argsort(dates_actes, kind="stable")
+        self.dates_actes_triees = dates_actes[self.ordre_actes]
+        self.sejour_des_actes = positions_sejours(donnees.sejours, donnees.actes["id_sejour"])
+        self.sejour_des_diagnostics = positions_sejours(donnees.sejours, donnees.diagnostics["id_sejour"])
+
+    def bornes(self):
+        """Première et dernière dates des données (entrées, sorties et actes), ``None`` si aucune."""
+        dates = pd.concat([
+            self.donnees.sejours["date_entree"], self.donnees.sejours["date_sortie"], self.donnees.actes["date_acte"]
+        ]).dropna()
+        if dates.empty:
+            return None
+        return dates.min().date(), dates.max().date()
+
+    def extraire(self, debut, fin) -> DonneesRHS:
+        """Données de la période du ``debut`` au ``fin`` inclus (dates)."""
+        sejours, actes, diagnostics = self.donnees.sejours, self.donnees.actes, self.donnees.diagnostics
+        lendemain = pd.Timestamp(fin) + pd.Timedelta(days=1)
+
+        # Séjours entrés avant la fin de la période : un préfixe de l'ordre par date d'entrée
+        candidats = self.ordre_sejours[:np.searchsorted(self.entrees_triees, _borne(lendemain, self.entrees_triees))]
+        sorties = sejours["date_sortie"].to_numpy()[candidats]
+        retenus = np.sort(candidats[np.isnat(sorties) | (sorties >= _borne(debut, sorties))])
+        sejour_retenu = np.zeros(len(sejours) + 1, dtype=bool)  # la dernière case : aucun séjour (position -1)
+        sejour_retenu[retenus] = True
+        sejour_retenu[-1] = True
+
+        # Actes de la période : une tranche de l'ordre par date
+        dates = self.dates_actes_triees
+        debut_tranche, fin_tranche = np.searchsorted(dates, [_borne(debut, dates), _borne(lendemain, dates)])
+        lignes_actes = np.sort(self.ordre_actes[debut_tranche:fin_tranche])
+        lignes_actes = lignes_actes[sejour_retenu[self.sejour_des_actes[lignes_actes]]]
+
+        lignes_diagnostics = np.flatnonzero(
+            (self.sejour_des_diagnostics >= 0) & sejour_retenu[self.sejour_des_diagnostics]
+        )
+        return DonneesRHS(
+            sejours=sejours.iloc[retenus].reset_index(drop=True),
+            actes=actes.iloc[lignes_actes].reset_index(drop=True),
+            diagnostics=diagnostics.iloc[lignes_diagnostics].reset_index(drop=True),
+        )
+
+
+def donnees_de_session(etat) -> DonneesRHS:
+    """Données chargées dans ``etat`` (``st.session_state``), restreintes à ``etat["periode"]`` s'il est défini.
+
+    L'index des dates et l'extrait de la période sont mémorisés dans la session
+    tant que les données et la période ne changent pas.
+    """
+    donnees = etat["donnees_rhs"]
+    periode = etat.get("periode")
+    if periode is None:
+        return donnees
+    extrait = etat.get("donnees_periode")
+    if extrait is None or extrait[0] is not donnees or extrait[1] != periode:
+        extrait = etat["donnees_periode"] = (donnees, periode, index_dates(etat).extraire(*periode))
+    return extrait[2]
+
+
+def index_dates(etat) -> IndexDates:
+    """Index des dates des données chargées dans ``etat``, recalculé quand elles changent."""
+    index = etat.get("index_dates")
+    if index is None or index.donnees is not etat["donnees_rhs"]:
+        index = etat["index_dates"] = IndexDates(etat["donnees_rhs"])
+    return index
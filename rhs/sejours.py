@@ -0,0 +1,154 @@
+"""Calculs sur la table des séjours : âge à l'entrée, durée de séjour et tranche d'âge.
+
+Tous les calculs sont vectorisés sur les colonnes datetime64 ; aucun ``apply``
+ligne à ligne n'est nécessaire. La table conservée en session reste compacte
+(dates en datetime64, âges en entiers 8 bits, catégories) : les dates en texte
+et la liste des actes de chaque séjour ne sont mises en forme que pour les
+lignes affichées ou exportées (``preparer_affichage``).
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from rhs.tranches import DECOUPAGE_STANDARD, DecoupageAge
+
+# Classes de durée de séjour (semaines), bornes inférieures incluses
+BORNES_DUREE = [1, 2, 4, 8, 13, 26]
+LIBELLES_DUREE = [
+    "< 1 semaine", "1-2 semaines", "2-4 semaines", "4-8 semaines", "8-13 semaines", "13-26 semaines",
+    "26 semaines et plus",
+]
+DUREE_EN_COURS = "Hospitalisation en cours"
+
+
+def ajouter_ages_durees(sejours: pd.DataFrame, decoupage: DecoupageAge | None = DECOUPAGE_STANDARD) -> pd.DataFrame:
+    """Renvoie une copie des séjours avec ``age_entree``, ``duree_sejour_semaines`` et ``tranche_age``.
+
+    L'âge est un entier 8 bits, manquant si les dates sont absentes ou incohérentes.
+    Sans ``decoupage``, la tranche d'âge n'est pas ajoutée.
+    """
+    df = sejours.copy()
+    ages = (df["date_entree"] - df["date_naissance"]).dt.days // 365
+    df["age_entree"] = ages.where(ages.between(-128, 127)).astype("Int8")
+    df["duree_sejour_semaines"] = (df["date_sortie"] - df["date_entree"]).dt.days / 7
+    if decoupage is not None:
+        df["tranche_age"] = decoupage.categoriser(df["age_entree"])
+    return df
+
+
+def regrouper_enregistrements(enregistrements: pd.DataFrame, premiers: np.ndarray) -> pd.DataFrame:
+    """Une ligne par séjour à partir des enregistrements RHS hebdomadaires, triés par ``id_ligne``.
+
+    ``premiers`` donne pour chaque enregistrement l'``id_ligne`` du premier
+    enregistrement de son séjour, qui devient celui du séjour. La date de sortie
+    retenue est la plus tardive (les RHS d'une hospitalisation en cours n'en
+    portent pas), les autres colonnes prennent leur première valeur renseignée.
+    """
+    if (premiers == enregistrements["id_ligne"].to_numpy()).all():
+        return enregistrements
+    groupes = enregistrements.groupby(premiers, sort=True)
+    sejours = groupes.first()
+    sejours["date_sortie"] = groupes["date_sortie"].max()
+    return sejours.reset_index(drop=True).astype(enregistrements.dtypes.to_dict())
+
+
+def positions_sejours(sejours: pd.DataFrame, id_sejours: pd.Series) -> np.ndarray:
+    """Position dans ``sejours`` (trié par ``id_ligne``) du séjour de chaque acte ou diagnostic.
+
+    ``id_sejours`` est la colonne ``id_sejour`` des actes ou des diagnostics ;
+    -1 pour ceux qui ne sont rattachés à aucun séjour de ``sejours``.
+    """
+    id_lignes = sejours["id_ligne"].to_numpy()
+    cherches = id_sejours.to_numpy()
+    positions = np.searchsorted(id_lignes, cherches)
+    trouves = positions < len(id_lignes)
+    trouves[trouves] = id_lignes[positions[trouves]] == cherches[trouves]
+    return np.where(trouves, positions, -1)
+
+
+def selon_sejour(valeurs, positions: np.ndarray, manquant=None):
+    """Valeur du séjour de chaque ligne, ``positions`` venant de ``positions_sejours``.
+
+    Les lignes sans séjour (position -1) reçoivent ``manquant`` (une catégorie
+    manquante si ``valeurs`` est catégoriel) ; seules les positions valides sont
+    lues, ``valeurs`` pouvant être vide.
+    """
+    rattachees = positions >= 0
+    if isinstance(valeurs, pd.Categorical):
+        codes = np.full(len(positions), -1, dtype=valeurs.codes.dtype)
+        codes[rattachees] = valeurs.codes[positions[rattachees]]
+        return pd.Categorical.from_codes(codes, dtype=valeurs.dtype)
+    valeurs = np.asarray(valeurs)
+    resultat = np.full(len(positions), manquant, dtype=object if manquant is None else valeurs.dtype)
+    resultat[rattachees] = valeurs[positions[rattachees]]
+    return resultat
+
+
+def classer_durees(durees: pd.Series) -> pd.Series:
+    """Classe de durée de chaque séjour, ``DUREE_EN_COURS`` pour les séjours sans date de sortie."""
+    classes = pd.cut(
+        durees, bins=[-float("inf"), *BORNES_DUREE, float("inf")], labels=LIBELLES_DUREE, right=False
+    )
+    return classes.cat.add_categories(DUREE_EN_COURS).fillna(DUREE_EN_COURS)
+
+
+def liens_actes(sejours: pd.DataFrame, actes: pd.DataFrame) -> pd.DataFrame:
+    """Actes CSARR de chaque séjour, toutes semaines confondues, dans l'ordre du fichier.
+
+    Colonnes : ``sejour`` (position dans ``sejours``, trié par ``id_ligne``) et
+    ``acte`` (catégoriel) ; les lignes sont triées par séjour.
+    """
+    positions = positions_sejours(sejours, actes["id_sejour"])
+    rattaches = positions >= 0
+    ordre = np.argsort(positions[rattaches], kind="stable")
+    return pd.DataFrame({
+        "sejour": positions[rattaches][ordre].astype(np.int32),
+        "acte": pd.Categorical(actes["code_csarr"].to_numpy()[rattaches][ordre]),
+    })
+
+
+def libeller_actes(liens: pd.DataFrame, positions) -> list:
+    """Actes de chaque séjour de ``positions``, joints par « - » (chaîne vide si aucun)."""
+    sejour = liens["sejour"].to_numpy()
+    debuts = np.searchsorted(sejour, positions, side="left")
+    fins = np.searchsorted(sejour, positions, side="right")
+    codes = liens["acte"].cat.codes.to_numpy()
+    libelles = liens["acte"].cat.categories.to_numpy(dtype=object)
+    return [" - ".join(libelles[c] for c in codes[d:f] if c >= 0) for d, f in zip(debuts, fins)]
+
+
+def preparer_affichage(sejours: pd.DataFrame, liens: pd.DataFrame) -> pd.DataFrame:
+    """Copie des séjours complétée des colonnes de présentation, pour ces lignes seulement.
+
+    ``sejours`` est une sélection de la table des séjours, dont l'index donne la
+    position de chaque séjour ; s'y ajoutent ``actes_csarr`` et les dates en texte
+    (``date_entree_affichee``, ``date_naissance_affichee``, ``date_sortie_affichee``).
+    """
+    df = sejours.copy()
+    df["actes_csarr"] = libeller_actes(liens, df.index.to_numpy())
+    df["date_entree_affichee"] = df["date_entree"].dt.strftime("%Y-%m-%d")
+    df["date_naissance_affichee"] = df["date_naissance"].dt.strftime("%Y-%m-%d")
+    df["date_sortie_affichee"] = df["date_sortie"].dt.strftime("%Y-%m-%d").fillna(DUREE_EN_COURS)
+    return df
+
+
+def _replier(texte: str) -> str:
+    """``texte`` en minuscules et sans accents."""
+    return "".join(c for c in unicodedata.normalize("NFKD", texte) if not unicodedata.combining(c)).casefold()
+
+
+def rechercher_sejours(sejours: pd.DataFrame, liens: pd.DataFrame, texte: str) -> np.ndarray:
+    """Masque des séjours dont l'identifiant ou l'un des actes CSARR contient ``texte`` (casse et accents ignorés).
+
+    La recherche porte sur les catégories, une fois par valeur distincte, puis sur leurs codes.
+    """
+    texte = _replier(texte)
+    identifiants = sejours["identifiant"].cat
+    trouves = identifiants.categories.map(_replier).str.contains(texte, regex=False)
+    masque = np.isin(identifiants.codes, np.flatnonzero(trouves))
+
+    actes = liens["acte"].cat
+    trouves = actes.categories.map(_replier).str.contains(texte, regex=False)
+    sejours_trouves = liens["sejour"].to_numpy()[np.isin(actes.codes, np.flatnonzero(trouves))]
+    return masque | np.isin(sejours.index.to_numpy(), sejours_trouves)
@@ -0,0 +1,67 @@
+"""Détection des séjours anormalement longs au sein de chaque tranche d'âge.
+
+Chaque méthode calcule, en une passe ``groupby().transform`` sur toutes les
+tranches, un seuil de durée par séjour ; un séjour est long si sa durée dépasse
+le seuil de sa tranche. Les séjours sans durée (hospitalisation en cours) ou
+sans tranche ne sont jamais signalés.
+"""
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Facteur rendant l'écart absolu médian comparable à un écart-type (loi normale)
+FACTEUR_MAD = 1.4826
+
+
+@dataclass(frozen=True)
+class MethodeSejoursLongs:
+    libelle: str
+    libelle_parametre: str
+    parametre_defaut: float
+    parametre_min: float
+    parametre_max: float
+    description: str
+
+
+METHODES = {
+    "moyenne": MethodeSejoursLongs(
+        "Moyenne × k", "k", 1.5, 1.0, 5.0,
+        "Séjour plus long que k fois la durée moyenne de sa tranche.",
+    ),
+    "percentile": MethodeSejoursLongs(
+        "Percentile de la tranche", "Percentile", 90.0, 50.0, 99.9,
+        "Séjour au-delà du percentile choisi des durées de sa tranche.",
+    ),
+    "iqr": MethodeSejoursLongs(
+        "Barrière de Tukey (IQR)", "k", 1.5, 0.5, 5.0,
+        "Séjour au-delà de Q3 + k × (Q3 − Q1), les quartiles étant ceux de sa tranche.",
+    ),
+    "mad": MethodeSejoursLongs(
+        "Médiane + k × MAD", "k", 3.0, 1.0, 10.0,
+        "Séjour au-delà de la médiane de sa tranche plus k écarts absolus médians (normalisés).",
+    ),
+}
+
+
+def seuils_sejours_longs(durees: pd.Series, tranches: pd.Series, methode: str, parametre: float) -> pd.Series:
+    """Seuil de durée applicable à chaque séjour, selon sa tranche."""
+    groupes = durees.groupby(tranches, observed=True)
+    if methode == "moyenne":
+        return groupes.transform("mean") * parametre
+    if methode == "percentile":
+        return groupes.transform("quantile", parametre / 100)
+    if methode == "iqr":
+        q1 = groupes.transform("quantile", 0.25)
+        q3 = groupes.transform("quantile", 0.75)
+        return q3 + parametre * (q3 - q1)
+    if methode == "mad":
+        mediane = groupes.transform("median")
+        mad = (durees - mediane).abs().groupby(tranches, observed=True).transform("median") * FACTEUR_MAD
+        return mediane + parametre * mad
+    raise ValueError(f"Méthode de détection inconnue : {methode}")
+
+
+def detecter_sejours_longs(durees: pd.Series, tranches: pd.Series, methode: str, parametre: float) -> pd.Series:
+    """Série booléenne : vrai pour les séjours dépassant le seuil de leur tranche."""
+    seuils = seuils_sejours_longs(durees, tranches, methode, parametre)
+    return (durees > seuils).fillna(False).astype(bool)
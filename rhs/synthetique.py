@@ -0,0 +1,194 @@
+"""Génération de fichiers RHS synthétiques, au format à positions fixes de l'ATIH.
+
+Les vrais extraits étant des données de santé, ils ne peuvent servir ni d'exemple
+ni de jeu d'essai : ce module produit des enregistrements fictifs mais conformes
+à la disposition d'un ``FormatRHS`` (les champs sont placés d'après ses positions),
+que l'application analyse comme un vrai fichier.
+
+Chaque séjour donne un RHS par semaine calendaire, de celle de l'entrée à celle
+de la sortie (ou de la fin de l'extrait), chacun comptant au moins un jour de
+présence et portant les actes CSARR de la semaine ; les séjours se succèdent,
+les patients étant repris en boucle.
+
+Usage ::
+
+    python -m rhs.synthetique fichier.txt --lignes 100000 --patients 5000 --actes-par-jour 2
+"""
+import argparse
+import functools
+import itertools
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from rhs.formats import FORMAT_M0C, FormatRHS
+
+# Codes plausibles en SMR : finalités de prise en charge, manifestations, étiologies, comorbidités
+FINALITES = ["Z501", "Z502", "Z5080", "Z5088", "Z509"]
+MANIFESTATIONS = ["G8190", "R262", "S7200", "M1790", "I634", "G200", "R5300", "M4806", "T840", "F0030"]
+ETIOLOGIES = ["I639", "W1900", "S720", "M169", "I611", "G35", "C509", "J449", "E440", "M800"]
+DIAGNOSTICS_ASSOCIES = [
+    "I10", "E119", "F329", "N390", "E440", "I489", "G309", "M810", "J449", "R296", "E785", "I500", "Z921", "K590",
+]
+ACTES_CSARR = [
+    "ALQ+071", "ALQ+285", "PEB+010", "PEB+191", "DKQ+123", "ZZC+045", "NKR+226", "GLB+030", "AGR+116", "ZZR+080",
+    "ZGR+220", "BLM+017", "PCM+201", "ZZQ+079", "ANQ+014",
+]
+
+
+@dataclass(frozen=True)
+class ParametresSynthese:
+    nb_patients: int = 1000
+    # Durée moyenne d'un séjour (semaines), tirée selon une loi exponentielle
+    duree_moyenne_semaines: float = 6.0
+    # Nombre moyen d'actes CSARR par jour de présence
+    actes_par_jour: float = 2.0
+    # Part des séjours laissés sans date de sortie, en plus de ceux qui se terminent après la fin de l'extrait
+    part_en_cours: float = 0.1
+    nb_diagnostics_associes_max: int = 4
+    debut: date = date(2024, 1, 1)
+    nb_jours: int = 365
+    finess: str = "123456789"
+    graine: int = 0
+
+
+@functools.lru_cache(maxsize=None)
+def _date(jour):
+    return jour.strftime("%d%m%Y") if jour is not None else ""
+
+
+def _gabarit(champs: dict, longueur: int) -> str:
+    """Chaîne de format plaçant chaque champ à sa position, les intervalles étant laissés à blanc."""
+    morceaux, position = [], 0
+    for nom, (debut, taille) in sorted(champs.items(), key=lambda c: c[1][0]):
+        morceaux.append(" " * (debut - position) + f"{{{nom}:<{taille}.{taille}}}")
+        position = debut + taille
+    return "".join(morceaux) + " " * (longueur - position)
+
+
+class _Enregistreur:
+    """Met en forme les enregistrements d'un ``FormatRHS`` à partir de gabarits calculés une fois."""
+
+    def __init__(self, format_rhs: FormatRHS):
+        self.format_rhs = format_rhs
+        self.partie_fixe = _gabarit(format_rhs.champs, format_rhs.debut_zone_variable)
+        self.acte = _gabarit(format_rhs.champs_acte_csarr, format_rhs.longueur_acte_csarr)
+        self.champs_vides = dict.fromkeys(format_rhs.champs, "")
+        self.champs_acte_vides = dict.fromkeys(format_rhs.champs_acte_csarr, "")
+
+    def __call__(self, valeurs: dict, diagnostics_associes, actes) -> str:
+        longueur_diagnostic = self.format_rhs.longueur_diagnostic
+        return (
+            self.partie_fixe.format_map({**self.champs_vides, **valeurs})
+            + "".join(d.ljust(longueur_diagnostic) for d in diagnostics_associes)
+            + "".join(
+                self.acte.format_map({
+                    **self.champs_acte_vides, "code": code, "date_realisation": date_realisation,
+                    "modulateur_lieu": "10", "nb_patients": "01", "nb_intervenants": "01", "nb_realisations": "01",
+                })
+                for code, date_realisation in actes
+            )
+        )
+
+
+def generer_lignes(parametres: ParametresSynthese = ParametresSynthese(), format_rhs: FormatRHS = FORMAT_M0C):
+    """Enregistrements RHS (sans fin de ligne), séjour après séjour, indéfiniment."""
+    aleatoire = random.Random(parametres.graine)
+    enregistrement = _Enregistreur(format_rhs)
+    fin_extrait = parametres.debut + timedelta(days=parametres.nb_jours)
+    naissances = [
+        date(1930, 1, 1) + timedelta(days=aleatoire.randrange(85 * 365)) for _ in range(parametres.nb_patients)
+    ]
+
+    for num_rhs in itertools.count():
+        patient = num_rhs % parametres.nb_patients
+        entree = parametres.debut + timedelta(days=aleatoire.randrange(parametres.nb_jours))
+        nb_semaines = max(1, round(aleatoire.expovariate(1 / parametres.duree_moyenne_semaines)))
+        sortie = entree + timedelta(days=7 * nb_semaines - aleatoire.randrange(7))
+        # Dernier jour de présence : la sortie, ou la fin de l'extrait si elle survient avant
+        dernier_jour = min(sortie, fin_extrait)
+        if aleatoire.random() < parametres.part_en_cours or sortie > fin_extrait:
+            sortie = None
+
+        valeurs = {
+            "finess": parametres.finess,
+            "version": format_rhs.version,
+            "num_sejour": f"{patient:08d}",
+            "date_naissance": _date(naissances[patient]),
+            "sexe": aleatoire.choice("12"),
+            "unite_medicale": "1001",
+            "date_entree": _date(entree),
+            "mode_entree": "8",
+            "date_sortie": _date(sortie),
+            "mode_sortie": "8" if sortie else "",
+            "code_postal": "75001",
+            "type_hospitalisation": "1",
+            "finalite_principale": aleatoire.choice(FINALITES),
+            "manifestation_morbide": aleatoire.choice(MANIFESTATIONS),
+            "affection_etiologique": aleatoire.choice(ETIOLOGIES),
+            "dependances": "".join(aleatoire.choice("1234") for _ in range(6)),
+        }
+        diagnostics_associes = aleatoire.sample(
+            DIAGNOSTICS_ASSOCIES, aleatoire.randint(0, parametres.nb_diagnostics_associes_max)
+        )
+
+        lundi = entree - timedelta(days=entree.weekday())
+        for semaine in range((dernier_jour - lundi).days // 7 + 1):
+            debut_semaine = lundi + timedelta(weeks=semaine)
+            presences = [entree <= debut_semaine + timedelta(days=j) <= dernier_jour for j in range(7)]
+            # Actes des jours ouvrés de la semaine passés dans le service
+            actes = [
+                (aleatoire.choice(ACTES_CSARR), _date(debut_semaine + timedelta(days=j)))
+                for j in range(5) if presences[j] for _ in range(_poisson(aleatoire, parametres.actes_par_jour))
+            ][:999]
+            yield enregistrement({
+                **valeurs,
+                "num_rhs": f"{num_rhs:08d}{semaine:03d}",
+                "date_lundi": _date(debut_semaine),
+                "jours_presence": "".join("1" if present else "0" for present in presences),
+                "nb_diagnostics_associes": f"{len(diagnostics_associes):02d}",
+                "nb_actes_ccam": "00",
+                "nb_actes_csarr": f"{len(actes):03d}",
+            }, diagnostics_associes, actes)
+
+
+def _poisson(aleatoire, moyenne):
+    """Tirage de Poisson (méthode de Knuth, suffisante pour de petites moyennes)."""
+    seuil, k, produit = pow(2.718281828459045, -moyenne), 0, aleatoire.random()
+    while produit > seuil:
+        k += 1
+        produit *= aleatoire.random()
+    return k
+
+
+def ecrire_fichier(chemin, nb_lignes: int, parametres: ParametresSynthese = ParametresSynthese(),
+                   format_rhs: FormatRHS = FORMAT_M0C):
+    """Écrit ``nb_lignes`` enregistrements synthétiques dans ``chemin``."""
+    with open(chemin, "w", encoding="latin-1", newline="\n") as fichier:
+        for ligne in itertools.islice(generer_lignes(parametres, format_rhs), nb_lignes):
+            fichier.write(ligne + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rhs.synthetique", description="Génère un fichier RHS synthétique.")
+    parser.add_argument("chemin", help="fichier à écrire")
+    parser.add_argument("--lignes", type=int, default=10_000, help="nombre d'enregistrements RHS")
+    parser.add_argument("--patients", type=int, default=ParametresSynthese.nb_patients)
+    parser.add_argument("--duree", type=float, default=ParametresSynthese.duree_moyenne_semaines,
+                        help="durée moyenne des séjours (semaines)")
+    parser.add_argument("--actes-par-jour", type=float, default=ParametresSynthese.actes_par_jour)
+    parser.add_argument("--en-cours", type=float, default=ParametresSynthese.part_en_cours,
+                        help="part des séjours sans date de sortie")
+    parser.add_argument("--diagnostics", type=int, default=ParametresSynthese.nb_diagnostics_associes_max,
+                        help="nombre maximal de diagnostics associés par séjour")
+    parser.add_argument("--graine", type=int, default=ParametresSynthese.graine)
+    args = parser.parse_args(argv)
+
+    ecrire_fichier(args.chemin, args.lignes, ParametresSynthese(
+        nb_patients=args.patients, duree_moyenne_semaines=args.duree, actes_par_jour=args.actes_par_jour,
+        part_en_cours=args.en_cours, nb_diagnostics_associes_max=args.diagnostics, graine=args.graine,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Tables dérivées des données importées, calculées à la demande et mémorisées.
+
+Chaque page demande les tables dont elle a besoin (``tables.obtenir("sejours_ages")``)
+au lieu de compter sur une autre page pour les avoir préparées dans la session.
+Une table n'est calculée qu'à son premier accès, à partir des tables analysées
+et des autres tables dérivées dont elle dépend, puis conservée tant que les
+mêmes données restent chargées ; une table qu'aucune page ne demande n'est
+jamais calculée.
+"""
+import pandas as pd
+
+from rhs.actes import durees_par_acte, stats_durees_par_acte, table_sejours_actes
+from rhs.cim10 import table_diagnostics
+from rhs.cube import chapitres_principaux, classes_age, cube_actes, cube_diagnostics, cube_sejours
+from rhs.parsing import DonneesRHS
+from rhs.periode import donnees_de_session
+from rhs.sejours import ajouter_ages_durees, classer_durees, liens_actes
+from rhs.tranches import DECOUPAGES
+
+_CONSTRUCTEURS = {}
+
+
+def table_derivee(nom):
+    """Enregistre la fonction décorée comme constructeur de la table ``nom``."""
+    def enregistrer(fonction):
+        _CONSTRUCTEURS[nom] = fonction
+        return fonction
+    return enregistrer
+
+
+class TablesDerivees:
+    """Tables dérivées d'un même ``DonneesRHS``, mémorisées par nom et paramètres."""
+
+    def __init__(self, donnees: DonneesRHS):
+        self.donnees = donnees
+        self._tables = {}
+
+    def obtenir(self, nom: str, **parametres) -> pd.DataFrame:
+        cle = (nom, *sorted(parametres.items()))
+        if cle not in self._tables:
+            self._tables[cle] = _CONSTRUCTEURS[nom](self, **parametres)
+        return self._tables[cle]
+
+
+def tables_de_session(etat) -> TablesDerivees:
+    """Tables dérivées des données chargées dans ``etat`` (``st.session_state``), sur la période choisie.
+
+    Elles sont recréées, vides, dès que les données de la session ou la période changent.
+    """
+    donnees = donnees_de_session(etat)
+    tables = etat.get("tables_derivees")
+    if tables is None or tables.donnees is not donnees:
+        tables = etat["tables_derivees"] = TablesDerivees(donnees)
+    return tables
+
+
+@table_derivee("actes_par_jour_patient")
+def _actes_par_jour_patient(tables):
+    # Actes datés rattachés à un patient, comptés par patient et par jour
+    actes = tables.donnees.actes.dropna(subset=["identifiant", "date_acte"])
+    df = (
+        actes.groupby(["identifiant", "date_acte"], sort=False, observed=True).size()
+        .reset_index(name="nb_actes")
+        .rename(columns={"identifiant": "patient_id"})
+    )
+    df["mois"] = df["date_acte"].dt.to_period("M").astype(str)
+    df["jour_semaine"] = df["date_acte"].dt.day_name()
+    return df
+
+
+@table_derivee("total_actes_par_patient")
+def _total_actes_par_patient(tables):
+    return tables.obtenir("actes_par_jour_patient").groupby("patient_id", observed=True)["nb_actes"].sum().reset_index()
+
+
+@table_derivee("sejours_ages")
+def _sejours_ages(tables):
+    # Table compacte, indexée par la position du séjour : les actes sont dans la table « actes_par_sejour »
+    # et les colonnes de présentation sont produites pour les lignes affichées (``preparer_affichage``)
+    df = tables.donnees.sejours.drop(columns="id_ligne").reset_index(drop=True)
+    df["identifiant"] = df["identifiant"].astype("category")
+    df = ajouter_ages_durees(df, decoupage=None)
+    df["classe_duree"] = classer_durees(df["duree_sejour_semaines"])
+    return df
+
+
+@table_derivee("actes_par_sejour")
+def _actes_par_sejour(tables):
+    return liens_actes(tables.donnees.sejours, tables.donnees.actes)
+
+
+@table_derivee("sejours_tranches")
+def _sejours_tranches(tables, decoupage):
+    # Les âges déjà calculés sont simplement recatégorisés selon le découpage demandé
+    sejours = tables.obtenir("sejours_ages")
+    return sejours.assign(tranche_age=DECOUPAGES[decoupage].categoriser(sejours["age_entree"]))
+
+
+@table_derivee("diagnostics_sejours")
+def _diagnostics_sejours(tables):
+    return table_diagnostics(tables.donnees.diagnostics, tables.donnees.sejours)
+
+
+@table_derivee("sejours_actes")
+def _sejours_actes(tables):
+    return table_sejours_actes(tables.donnees.sejours, tables.donnees.actes)
+
+
+@table_derivee("durees_par_acte")
+def _durees_par_acte(tables):
+    return durees_par_acte(tables.obtenir("sejours_actes"))
+
+
+@table_derivee("stats_durees_par_acte")
+def _stats_durees_par_acte(tables):
+    return stats_durees_par_acte(tables.obtenir("durees_par_acte"))
+
+
+def _dimensions_sejours(tables):
+    # Classe d'âge élémentaire et chapitre principal de chaque séjour, dans l'ordre de ``sejours_ages``
+    sejours = tables.obtenir("sejours_ages")
+    return classes_age(sejours["age_entree"]), chapitres_principaux(tables.obtenir("diagnostics_sejours"), len(sejours))
+
+
+@table_derivee("cube_actes")
+def _cube_actes(tables):
+    return cube_actes(tables.donnees.actes, tables.donnees.sejours, *_dimensions_sejours(tables))
+
+
+@table_derivee("cube_sejours")
+def _cube_sejours(tables):
+    return cube_sejours(tables.obtenir("sejours_ages"), *_dimensions_sejours(tables))
+
+
+@table_derivee("cube_diagnostics")
+def _cube_diagnostics(tables):
+    classes, _ = _dimensions_sejours(tables)
+    return cube_diagnostics(tables.obtenir("diagnostics_sejours"), classes, tables.obtenir("sejours_ages")["classe_duree"])
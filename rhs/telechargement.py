@@ -0,0 +1,74 @@
+"""Boutons de téléchargement des pages d'analyse.
+
+Rien n'est sérialisé tant que l'utilisateur n'a pas demandé l'export : un
+premier bouton prépare les fichiers (mémorisés, voir ``rhs.export``), puis les
+boutons de téléchargement restent disponibles tant que le tableau ne change pas.
+Un tableau compact peut être accompagné d'une fonction ``preparer`` qui le met
+en forme (dates en texte, libellés) au moment de l'export seulement.
+"""
+import streamlit as st
+
+from rhs.export import MIME_CSV, MIME_XLSX, csv_memorise, empreinte_dataframe, xlsx_memorise
+from rhs.instrumentation import etape
+
+
+def _export_demande(cle, version, label):
+    """Vrai si l'export ``cle`` a été demandé pour cette version des données."""
+    if cle in st.session_state and st.session_state[cle] == version:
+        return True
+    if st.button(label, key=f"{cle}:preparer"):
+        st.session_state[cle] = version
+        return True
+    return False
+
+
+def telecharger_dataframe(df, nom_fichier_base="export", preparer=None):
+    cle = f"export:{nom_fichier_base}"
+    # L'empreinte n'est calculée que si un export a déjà été demandé sur cette page
+    version = empreinte_dataframe(df) if cle in st.session_state else None
+    if not _export_demande(cle, version, "Préparer l'export (CSV / Excel)"):
+        return
+    if version is None:
+        st.session_state[cle] = empreinte_dataframe(df)
+
+    with etape(st.session_state, "export"):
+        if preparer is not None:
+            df = preparer(df)
+        donnees_csv = csv_memorise(df)
+        donnees_xlsx = xlsx_memorise({"Feuille1": df})
+    st.download_button(
+        label="Télécharger en CSV",
+        data=donnees_csv,
+        file_name=f"{nom_fichier_base}.csv",
+        mime=MIME_CSV
+    )
+    st.download_button(
+        label="Télécharger en Excel",
+        data=donnees_xlsx,
+        file_name=f"{nom_fichier_base}.xlsx",
+        mime=MIME_XLSX
+    )
+
+
+def telecharger_export_global(dfs: dict, nom_fichier="export_global.xlsx",
+                              label="Télécharger tous les tableaux (Excel)", preparer=None):
+    """``preparer`` associe à certains noms de feuille la fonction de mise en forme de leur tableau."""
+    cle = f"export:{nom_fichier}"
+    version = (
+        tuple((nom, empreinte_dataframe(df)) for nom, df in dfs.items()) if cle in st.session_state else None
+    )
+    if not _export_demande(cle, version, "Préparer l'export global (Excel)"):
+        return
+    if version is None:
+        st.session_state[cle] = tuple((nom, empreinte_dataframe(df)) for nom, df in dfs.items())
+
+    with etape(st.session_state, "export"):
+        if preparer:
+            dfs = {nom: preparer[nom](df) if nom in preparer else df for nom, df in dfs.items()}
+        donnees_xlsx = xlsx_memorise(dfs)
+    st.download_button(
+        label=label,
+        data=donnees_xlsx,
+        file_name=nom_fichier,
+        mime=MIME_XLSX
+    )
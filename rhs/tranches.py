@@ -0,0 +1,56 @@
+"""Découpages de l'âge en tranches, partagés par les pages d'analyse.
+
+Un découpage fournit les bornes, les libellés et l'ordre de ses tranches ; il
+range un âge (en années révolues) dans une tranche sous forme de catégorie
+ordonnée. Changer de découpage revient à recatégoriser les âges déjà calculés.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class DecoupageAge:
+    nom: str
+    # Borne supérieure (incluse) de chaque tranche sauf la dernière, ouverte
+    bornes: tuple
+    libelles: tuple
+
+    def __post_init__(self):
+        if len(self.libelles) != len(self.bornes) + 1:
+            raise ValueError(f"Le découpage « {self.nom} » doit avoir une tranche de plus que de bornes.")
+
+    @property
+    def ordre(self) -> list:
+        return list(self.libelles)
+
+    def categoriser(self, ages: pd.Series) -> pd.Series:
+        """Tranche de chaque âge, en catégorie ordonnée ; les âges manquants restent manquants."""
+        return pd.cut(ages, bins=[-np.inf, *self.bornes, np.inf], labels=self.libelles, ordered=True)
+
+
+DECOUPAGE_STANDARD = DecoupageAge(
+    nom="Tranches standard",
+    bornes=(12, 17, 29, 39, 49, 59, 69, 79, 84, 89, 94),
+    libelles=(
+        "Moins de 13 ans", "13-17 ans", "18-29 ans", "30-39 ans", "40-49 ans",
+        "50-59 ans", "60-69 ans", "70-79 ans", "80-84 ans", "85-89 ans",
+        "90-94 ans", "95 ans et plus",
+    ),
+)
+
+DECOUPAGE_5_ANS = DecoupageAge(
+    nom="Tranches de 5 ans",
+    bornes=tuple(range(4, 95, 5)),
+    libelles=tuple(f"{debut}-{debut + 4} ans" for debut in range(0, 95, 5)) + ("95 ans et plus",),
+)
+
+# Classes d'âge de la classification SMR en GME : pédiatrie (trois classes) et adultes
+DECOUPAGE_GME = DecoupageAge(
+    nom="Classes d'âge GME (SMR)",
+    bornes=(5, 12, 17, 74),
+    libelles=("Moins de 6 ans", "6-12 ans", "13-17 ans", "18-74 ans", "75 ans et plus"),
+)
+
+DECOUPAGES = {d.nom: d for d in (DECOUPAGE_STANDARD, DECOUPAGE_5_ANS, DECOUPAGE_GME)}
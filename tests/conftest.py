@@ -0,0 +1,54 @@
+import io
+import itertools
+
+import pytest
+
+from rhs.formats import FORMAT_M0C
+from rhs.parsing import lire_fichier_rhs
+from rhs.synthetique import ParametresSynthese, _Enregistreur, generer_lignes
+from rhs.tables import TablesDerivees
+
+# Fichier sans version de format reconnue : analysé par expressions régulières.
+# Les actes et le diagnostic précèdent toute ligne de séjour.
+TEXTE_SANS_SEJOUR = b"ALQ+071  10170320230101 G819\nZZC+045  10180320230101\n"
+
+
+def lire(contenu: bytes, **options):
+    return lire_fichier_rhs(io.BytesIO(contenu), **options)
+
+
+@pytest.fixture
+def donnees_sans_sejour():
+    return lire(TEXTE_SANS_SEJOUR)
+
+
+@pytest.fixture(scope="session")
+def tables_synthetiques():
+    lignes = itertools.islice(generer_lignes(ParametresSynthese(nb_patients=200, graine=1)), 3000)
+    return TablesDerivees(lire(fichier(*(ligne.encode("latin-1") for ligne in lignes))))
+
+
+def enregistrement_m0c(diagnostics_associes=(), actes=(), **valeurs) -> bytes:
+    """Un enregistrement RHS au format M0C ; ``actes`` : couples (code, date JJMMAAAA)."""
+    champs = {
+        "finess": "123456789", "version": FORMAT_M0C.version, "num_sejour": "S1", "num_rhs": "1",
+        "date_naissance": "01011950", "date_entree": "01032024", "date_lundi": "26022024",
+        "jours_presence": "1111111", "finalite_principale": "Z501", "manifestation_morbide": "G8190",
+        "nb_diagnostics_associes": f"{len(diagnostics_associes):02d}", "nb_actes_ccam": "00",
+        "nb_actes_csarr": f"{len(actes):03d}", **valeurs,
+    }
+    return _Enregistreur(FORMAT_M0C)(champs, diagnostics_associes, actes).encode("latin-1")
+
+
+def fichier(*enregistrements) -> bytes:
+    return b"".join(e + b"\n" for e in enregistrements)
+
+
+# Deux semaines du séjour S1, entrecoupées d'un autre séjour du même patient
+# (S1, entré plus tôt) : trois enregistrements, deux séjours.
+SEMAINES_ENTRECOUPEES = fichier(
+    enregistrement_m0c(date_lundi="26022024", actes=[("ZZC+045", "01032024")], diagnostics_associes=["R262"]),
+    enregistrement_m0c(date_entree="01012024", date_sortie="20012024", actes=[("PEB+010", "02012024")]),
+    enregistrement_m0c(date_lundi="04032024", date_sortie="06032024",
+                       actes=[("ZZC+045", "04032024"), ("ALQ+071", "05032024")]),
+)
@@ -0,0 +1,8 @@
+from rhs.batch import analyses_completes
+
+
+def test_fichier_sans_sejour(donnees_sans_sejour):
+    resultats = analyses_completes(donnees_sans_sejour)
+
+    assert resultats["sejours_par_tranche"].empty
+    assert resultats["diagnostics_par_chapitre"]["fréquence"].tolist() == [1]
@@ -0,0 +1,53 @@
+import hashlib
+import io
+
+from rhs.cache import CacheLRU, empreinte, empreinte_fichier
+
+
+def test_empreinte_sha256_du_contenu():
+    contenu = b"12345678 010320242003202401011950 ZZC+045\n" * 1000
+    fichier = io.BytesIO(contenu)
+    fichier.seek(123)
+
+    # Lu par petits blocs, puis rembobiné pour l'analyse qui suit
+    assert empreinte_fichier(fichier, taille_bloc=1000) == hashlib.sha256(contenu).hexdigest()
+    assert fichier.tell() == 0
+    assert empreinte(contenu) == empreinte_fichier(io.BytesIO(contenu))
+    assert empreinte_fichier(io.BytesIO(contenu + b"\n")) != empreinte(contenu)
+
+
+def test_meme_contenu_calcule_une_fois():
+    """Deux fichiers de même contenu partagent leur entrée : l'analyse n'est faite qu'une fois."""
+    cache = CacheLRU(1000, mesurer=len)
+    calculs = []
+
+    def analyser(fichier):
+        calculs.append(fichier)
+        return fichier.getvalue()
+
+    for fichier in (io.BytesIO(b"extrait de mars"), io.BytesIO(b"extrait de mars"), io.BytesIO(b"extrait d'avril")):
+        cache.obtenir(empreinte_fichier(fichier), lambda: analyser(fichier))
+
+    assert len(calculs) == 2
+    assert len(cache) == 2
+
+
+def test_eviction_du_moins_recemment_utilise():
+    # Trois valeurs de 10 octets tiennent dans le cache, pas quatre
+    cache = CacheLRU(30, mesurer=len)
+    for cle in "abc":
+        cache.obtenir(cle, lambda cle=cle: cle.encode() * 10)
+
+    # « a », la plus ancienne, est relue : « b » devient la moins récemment utilisée
+    assert cache.obtenir("a", lambda: b"recalcul") == b"a" * 10
+    cache.obtenir("d", lambda: b"d" * 10)
+    assert [cle for cle in "abcd" if cle in cache] == ["a", "c", "d"]
+    assert cache.taille_octets == 30
+
+    cache.obtenir("e", lambda: b"e" * 10)
+    assert [cle for cle in "acde" if cle in cache] == ["a", "d", "e"]
+
+    # Une valeur dépassant seule le plafond est conservée, et elle seule
+    cache.obtenir("f", lambda: b"f" * 50)
+    assert "f" in cache
+    assert len(cache) == 1
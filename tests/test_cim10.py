@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from rhs.cim10 import NIVEAUX, caracteristique_sejour, effectifs, table_diagnostics, tableau_croise
+from rhs.sejours import classer_durees
+
+
+def test_diagnostics_sans_sejour(donnees_sans_sejour):
+    diagnostics = table_diagnostics(donnees_sans_sejour.diagnostics, donnees_sans_sejour.sejours)
+
+    assert list(diagnostics["sejour"]) == [-1]
+    assert diagnostics["identifiant"].isna().all()
+    assert diagnostics["chapitre"].iloc[0].startswith("VI ")
+
+
+def test_caracteristique_sans_sejour(donnees_sans_sejour):
+    diagnostics = table_diagnostics(donnees_sans_sejour.diagnostics, donnees_sans_sejour.sejours)
+    classes = classer_durees(pd.Series([], dtype=float))
+
+    caracteristique = caracteristique_sejour(diagnostics, classes)
+
+    assert list(caracteristique.isna()) == [True]
+    assert list(caracteristique.categories) == list(classes.cat.categories)
+
+
+def _selections(diagnostics):
+    """Diagnostics entiers, puis filtrés comme sur la page 3 (par rôle, par famille)."""
+    return {
+        "toutes": diagnostics,
+        "principaux": diagnostics[diagnostics["role"] == "Principal"],
+        "une famille": diagnostics[diagnostics["chapitre"] == "II - Tumeurs"],
+    }
+
+
+SELECTIONS = ["toutes", "principaux", "une famille"]
+
+
+@pytest.mark.parametrize("niveau", NIVEAUX.values())
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_effectifs(tables_synthetiques, selection, niveau):
+    diagnostics = _selections(tables_synthetiques.obtenir("diagnostics_sejours"))[selection]
+    # La sélection est plus courte que la table des séjours, dont ``sejour`` donne les positions
+    assert selection != "une famille" or len(diagnostics) < diagnostics["sejour"].max()
+
+    resultat = effectifs(diagnostics, niveau).set_index(niveau)
+
+    groupes = diagnostics.groupby(niveau, observed=True)
+    attendu = pd.DataFrame({"fréquence": groupes.size(), "nb_sejours": groupes["sejour"].nunique()})
+    assert resultat["fréquence"].is_monotonic_decreasing
+    assert resultat.sort_index().to_dict() == attendu.sort_index().to_dict()
+
+
+@pytest.mark.parametrize("niveau", NIVEAUX.values())
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_tableau_croise(tables_synthetiques, selection, niveau):
+    diagnostics = _selections(tables_synthetiques.obtenir("diagnostics_sejours"))[selection]
+    classes = caracteristique_sejour(diagnostics, tables_synthetiques.obtenir("sejours_ages")["classe_duree"])
+
+    tableau = tableau_croise(diagnostics[niveau].array, classes)
+
+    attendu = pd.crosstab(diagnostics[niveau].to_numpy(), classes.to_numpy())
+    attendu = attendu.reindex(columns=list(classes.categories), fill_value=0)
+    assert list(tableau.columns) == list(classes.categories)
+    assert (tableau.loc[attendu.index].to_numpy() == attendu.to_numpy()).all()
+    assert len(tableau) == len(attendu)
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from rhs.corpus import CorpusRHS
+from rhs.tables import TablesDerivees
+
+from conftest import enregistrement_m0c, fichier, lire
+
+SEMAINE_1 = enregistrement_m0c(actes=[("ZZC+045", "01032024")])
+SEMAINE_2 = enregistrement_m0c(date_lundi="04032024", date_sortie="06032024", actes=[("ALQ+071", "05032024")])
+AUTRE_SEJOUR = enregistrement_m0c(num_sejour="S2", date_entree="15022024", actes=[("PEB+010", "16022024")])
+
+
+def test_extraits_recouvrants(tmp_path):
+    """Un séjour repris dans l'envoi suivant n'est compté qu'une fois, dans sa version la plus récente."""
+    corpus = CorpusRHS(tmp_path)
+    corpus.ajouter(lire(fichier(AUTRE_SEJOUR, SEMAINE_1)), "a", "mars.txt")
+    corpus.ajouter(lire(fichier(SEMAINE_1, SEMAINE_2)), "b", "avril.txt")
+
+    donnees = corpus.charger()
+
+    assert len(donnees.sejours) == 2
+    courant = donnees.sejours[donnees.sejours["identifiant"] == "S1"].iloc[0]
+    assert courant["date_sortie"] == pd.Timestamp("2024-03-06")
+    actes = donnees.actes.merge(donnees.sejours, left_on="id_sejour", right_on="id_ligne", suffixes=("", "_sejour"))
+    assert len(actes) == len(donnees.actes) == 3
+    assert sorted(actes.loc[actes["identifiant_sejour"] == "S1", "code_csarr"]) == ["ALQ+071", "ZZC+045"]
+    assert TablesDerivees(donnees).obtenir("sejours_actes")["nb_actes"].sum() == 3
+
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rhs import cube
+from rhs.cim10 import caracteristique_sejour, tableau_croise
+from rhs.tables import TablesDerivees
+from rhs.tranches import DECOUPAGE_STANDARD, DECOUPAGES
+
+
+def test_cubes_sans_sejour(donnees_sans_sejour):
+    tables = TablesDerivees(donnees_sans_sejour)
+
+    actes = tables.obtenir("cube_actes")
+    assert actes["nb_actes"].sum() == 2
+    assert actes["classe_age"].tolist() == [-1, -1]
+    assert actes["chapitre"].isna().all()
+    assert tables.obtenir("cube_sejours").empty
+    assert tables.obtenir("cube_diagnostics")["nb_diagnostics"].sum() == 1
+
+
+def test_cube_totaux(tables_synthetiques):
+    donnees = tables_synthetiques.donnees
+
+    assert tables_synthetiques.obtenir("cube_actes")["nb_actes"].sum() == len(donnees.actes)
+    assert tables_synthetiques.obtenir("cube_sejours")["nb_sejours"].sum() == len(donnees.sejours)
+    assert tables_synthetiques.obtenir("cube_diagnostics")["nb_diagnostics"].sum() == len(donnees.diagnostics)
+
+
+@pytest.mark.parametrize("decoupage", DECOUPAGES.values(), ids=DECOUPAGES.keys())
+def test_synthese_par_tranche_du_cube(tables_synthetiques, decoupage):
+    sejours = tables_synthetiques.obtenir("sejours_tranches", decoupage=decoupage.nom)
+
+    termines = sejours.groupby("tranche_age", observed=False)["duree_sejour_semaines"]
+
+    synthese = cube.synthese_par_tranche(tables_synthetiques.obtenir("cube_sejours"), decoupage)
+
+    assert synthese["tranche_age"].tolist() == list(decoupage.libelles)
+    assert synthese["nb_sejours"].tolist() == termines.count().tolist()
+    assert synthese["duree_moyenne"].tolist() == termines.mean().round(2).fillna(0).tolist()
+
+
+@pytest.mark.parametrize("decoupage", DECOUPAGES.values(), ids=DECOUPAGES.keys())
+def test_mediane_du_cube(tables_synthetiques, decoupage):
+    sejours = tables_synthetiques.obtenir("sejours_tranches", decoupage=decoupage.nom)
+    termines = sejours.dropna(subset=["duree_sejour_semaines", "tranche_age"])
+    attendues = termines.groupby("tranche_age", observed=True)["duree_sejour_semaines"].agg(
+        lambda durees: np.quantile(np.floor(durees), 0.5, method="inverted_cdf")
+    )
+
+    medianes = cube.quantiles_durees(tables_synthetiques.obtenir("cube_sejours"), "tranche_age", {"mediane": 0.5},
+                                     decoupage)
+
+    assert medianes.set_index("tranche_age")["mediane"].reindex(attendues.index).tolist() == attendues.tolist()
+
+
+@pytest.mark.parametrize("roles", [None, ["Principal"]])
+@pytest.mark.parametrize("colonne", ["tranche_age", "classe_duree"])
+def test_croisement_chapitres_du_cube(tables_synthetiques, colonne, roles):
+    decoupage = DECOUPAGE_STANDARD
+    diagnostics = tables_synthetiques.obtenir("diagnostics_sejours")
+    if roles is not None:
+        diagnostics = diagnostics[diagnostics["role"].isin(roles)]
+    if colonne == "tranche_age":
+        serie = tables_synthetiques.obtenir("sejours_tranches", decoupage=decoupage.nom)["tranche_age"]
+    else:
+        serie = tables_synthetiques.obtenir("sejours_ages")["classe_duree"]
+    attendu = tableau_croise(diagnostics["chapitre"].array, caracteristique_sejour(diagnostics, serie))
+
+    croisement = cube.croisement_chapitres(tables_synthetiques.obtenir("cube_diagnostics"), colonne, roles,
+                                           decoupage=decoupage)
+
+    assert list(croisement.index) == [str(chapitre) for chapitre in attendu.index]
+    assert list(croisement.columns) == [str(valeur) for valeur in attendu.columns]
+    assert (croisement.to_numpy() == attendu.to_numpy()).all()
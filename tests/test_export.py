@@ -0,0 +1,66 @@
+import io
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+from rhs.export import exporter_xlsx
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+ORIGINE_EXCEL = pd.Timestamp("1899-12-30")
+
+
+def _relire_xlsx(contenu: bytes) -> dict:
+    """Cellules de chaque feuille du classeur, relues dans son XML : {feuille: {référence: valeur}}.
+
+    Les textes sont relus en ``str``, les nombres en ``float`` et les nombres au format date
+    en ``pd.Timestamp`` ; une cellule vide n'a pas de référence.
+    """
+    with zipfile.ZipFile(io.BytesIO(contenu)) as archive:
+        styles = ElementTree.fromstring(archive.read("xl/styles.xml"))
+        formats = {f.get("numFmtId"): f.get("formatCode") for f in styles.iterfind("x:numFmts/x:numFmt", NS)}
+        styles_dates = {
+            str(i) for i, xf in enumerate(styles.iterfind("x:cellXfs/x:xf", NS))
+            if "yy" in formats.get(xf.get("numFmtId"), "")
+        }
+        classeur = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        feuilles = {}
+        for numero, feuille in enumerate(classeur.iterfind("x:sheets/x:sheet", NS), start=1):
+            donnees = ElementTree.fromstring(archive.read(f"xl/worksheets/sheet{numero}.xml"))
+            cellules = {}
+            for c in donnees.iterfind("x:sheetData/x:row/x:c", NS):
+                if c.get("t") == "inlineStr":
+                    cellules[c.get("r")] = c.find("x:is/x:t", NS).text
+                elif c.get("s") in styles_dates:
+                    cellules[c.get("r")] = ORIGINE_EXCEL + pd.Timedelta(days=float(c.find("x:v", NS).text))
+                else:
+                    cellules[c.get("r")] = float(c.find("x:v", NS).text)
+            feuilles[feuille.get("name")] = cellules
+    return feuilles
+
+
+def test_exporter_xlsx_relu_cellule_par_cellule():
+    """Chaque cellule garde son type et sa valeur, ligne après ligne ; les valeurs manquantes restent vides."""
+    df = pd.DataFrame({
+        "code_csarr": pd.array(["ZZC+045", None, "=1+1"], dtype="str"),
+        "nb_actes": [3, 1, 12],
+        "duree_moyenne": [1.5, np.nan, 2.25],
+        "date_entree": pd.to_datetime(["2024-03-01", None, "2024-01-20"]),
+        "tranche_age": pd.Categorical(["0-17", "18-64", None]),
+    })
+    autre = pd.DataFrame({"identifiant": ["12345678"]})
+    nom_long = "Durées moyennes par tranche d'âge et par acte"
+
+    feuilles = _relire_xlsx(exporter_xlsx({"Actes": df, nom_long: autre}))
+
+    assert list(feuilles) == ["Actes", nom_long[:31]]
+    assert feuilles["Actes"] == {
+        "A1": "code_csarr", "B1": "nb_actes", "C1": "duree_moyenne", "D1": "date_entree", "E1": "tranche_age",
+        "A2": "ZZC+045", "B2": 3.0, "C2": 1.5, "D2": pd.Timestamp("2024-03-01"), "E2": "0-17",
+        "B3": 1.0, "E3": "18-64",
+        # Un texte commençant par « = » reste un texte, pas une formule
+        "A4": "=1+1", "B4": 12.0, "C4": 2.25, "D4": pd.Timestamp("2024-01-20"),
+    }
+    # Un identifiant numérique reste du texte (zéros et longueur conservés)
+    assert feuilles[nom_long[:31]] == {"A1": "identifiant", "A2": "12345678"}
@@ -0,0 +1,79 @@
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from rhs.batch import analyses_completes
+from rhs.formats import FORMAT_M0C, SCHEMAS, decoder_largeur_fixe
+from rhs.tables import TablesDerivees
+
+from conftest import enregistrement_m0c, fichier, lire
+
+FICHIERS_SANS_ACTE = {
+    "aucun acte": fichier(enregistrement_m0c(), enregistrement_m0c(num_sejour="S2", date_sortie="15032024")),
+    "lignes trop courtes": fichier(b"123456789M0C S1", b"123456789M0C"),
+    "fichier vide": b"",
+}
+
+
+@pytest.mark.parametrize("contenu", FICHIERS_SANS_ACTE.values(), ids=FICHIERS_SANS_ACTE.keys())
+def test_tables_vides_typees(contenu):
+    donnees = lire(contenu)
+
+    for nom, schema in SCHEMAS.items():
+        table = getattr(donnees, nom)
+        if nom != "sejours":
+            # Ajouté au regroupement par séjour, après le décodage
+            schema = {**schema, "id_sejour": "int64"}
+        assert list(table.columns) == list(schema)
+        for colonne, type_colonne in schema.items():
+            if colonne != "identifiant" or nom != "actes":
+                assert table[colonne].dtype == pd.api.types.pandas_dtype(type_colonne), (nom, colonne)
+    assert isinstance(donnees.actes["identifiant"].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.parametrize("contenu", FICHIERS_SANS_ACTE.values(), ids=FICHIERS_SANS_ACTE.keys())
+def test_analyses_sans_acte(contenu):
+    donnees = lire(contenu)
+    tables = TablesDerivees(donnees)
+
+    resultats = analyses_completes(donnees)
+
+    assert resultats["actes_par_jour_patient"].empty
+    assert resultats["durees_par_acte"].empty
+    assert tables.obtenir("cube_actes").empty
+    assert tables.obtenir("cube_sejours")["nb_sejours"].sum() == len(resultats["sejours_par_tranche"])
+
+
+def test_enregistrement_long_sans_elargir_les_autres():
+    """Un enregistrement de 999 actes ne doit pas faire allouer 999 zones d'actes à chaque ligne."""
+    courant = enregistrement_m0c(diagnostics_associes=["R262"], actes=[("ZZC+045", "04032024")])
+    long = enregistrement_m0c(num_sejour="S2", actes=[("ALQ+071", "05032024")] * 999)
+    lignes = [courant] * 2000 + [long]
+
+    tracemalloc.start()
+    try:
+        sejours, actes, diagnostics = decoder_largeur_fixe(lignes, FORMAT_M0C)
+        pic = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # Une matrice complétée à la ligne la plus longue dépasserait 70 Mo
+    assert pic < 10 * sum(map(len, lignes))
+    assert len(sejours) == 2001
+    assert len(actes) == 2000 + 999
+    assert (actes["id_ligne"].to_numpy()[:2000] == range(2000)).all()
+    assert set(actes.loc[actes["id_ligne"] == 2000, "code_csarr"]) == {"ALQ+071"}
+    assert actes["date_acte"].iloc[-1] == pd.Timestamp("2024-03-05")
+    assert (diagnostics["type_diagnostic"] == "DA").sum() == 2000
+
+
+def test_zone_variable_tronquee():
+    """Les actes annoncés mais absents d'une ligne coupée sont ignorés, sans lire la ligne suivante."""
+    complet = enregistrement_m0c(actes=[("ZZC+045", "04032024"), ("ALQ+071", "05032024")])
+    coupe = complet[:-FORMAT_M0C.longueur_acte_csarr]
+
+    _, actes, _ = decoder_largeur_fixe([coupe, complet], FORMAT_M0C)
+
+    assert actes["id_ligne"].tolist() == [0, 1, 1]
+    assert actes["code_csarr"].tolist() == ["ZZC+045", "ZZC+045", "ALQ+071"]
@@ -0,0 +1,28 @@
+import threading
+import tracemalloc
+
+from rhs.instrumentation import Instrumentation
+
+
+def test_etapes_de_sessions_concurrentes():
+    """Le pic d'une étape ne compte pas la mémoire allouée pendant ce temps par l'étape d'une autre session."""
+    petite, grosse = Instrumentation("a", active=True), Instrumentation("b", active=True)
+    petite_ouverte = threading.Event()
+
+    def session_grosse():
+        petite_ouverte.wait()
+        with grosse.etape("rendu"):
+            bytearray(50 * 2 ** 20)
+
+    fil = threading.Thread(target=session_grosse)
+    fil.start()
+    with petite.etape("rendu"):
+        bytearray(2 ** 20)
+        petite_ouverte.set()
+        threading.Event().wait(0.2)
+    fil.join()
+    # Lancé par l'instrumentation active, il ralentirait les tests suivants
+    tracemalloc.stop()
+
+    assert grosse.mesures["rendu"]["memoire_mo"] >= 50
+    assert petite.mesures["rendu"]["memoire_mo"] < 5
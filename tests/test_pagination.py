@@ -0,0 +1,93 @@
+import sys
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+@pytest.fixture(autouse=True)
+def module_principal(monkeypatch):
+    """Rétablit ``__main__``, que le script de test remplace : les processus lancés par « spawn » le rechargent."""
+    monkeypatch.setitem(sys.modules, "__main__", sys.modules["__main__"])
+
+
+def _tableau():
+    import pandas as pd
+    import streamlit as st
+
+    from rhs.pagination import paginer
+
+    # 120 lignes : deux pages pleines de 50 et une dernière de 20
+    df = pd.DataFrame({"nom": [f"ligne {i:03d}" for i in range(120)], "valeur": [i % 7 for i in range(120)]})
+    lignes, page = paginer(
+        df, "t", {"Ordre du fichier": None, "Valeur": "valeur"},
+        rechercher=lambda df, texte: df["nom"].str.contains(texte, regex=False),
+    )
+    st.session_state["resultat"] = (lignes.index.tolist(), page.index.tolist())
+
+
+def _ouvrir():
+    return AppTest.from_function(_tableau, default_timeout=30).run()
+
+
+def _resultat(app):
+    assert not app.exception
+    return app.session_state["resultat"]
+
+
+def test_pages_et_derniere_page_incomplete():
+    app = _ouvrir()
+    lignes, page = _resultat(app)
+    assert lignes == list(range(120))
+    assert page == list(range(50))
+    assert app.caption[0].value == "120 ligne(s), page 1 sur 3"
+
+    lignes, page = _resultat(app.number_input(key="t:page").set_value(2).run())
+    assert page == list(range(50, 100))
+
+    lignes, page = _resultat(app.number_input(key="t:page").set_value(3).run())
+    assert page == list(range(100, 120))
+
+    # Avec des pages de 200 lignes, tout tient sur une seule page
+    app.selectbox(key="t:taille").set_value(200).run()
+    lignes, page = _resultat(app)
+    assert page == list(range(120))
+    assert app.caption[0].value == "120 ligne(s), page 1 sur 1"
+
+
+def test_tri_et_ordre_decroissant():
+    app = _ouvrir()
+    app.toggle(key="t:decroissant").set_value(True).run()
+    lignes, page = _resultat(app)
+    assert lignes == list(range(119, -1, -1))
+
+    app.selectbox(key="t:tri").set_value("Valeur").run()
+    lignes, page = _resultat(app)
+    valeurs = [i % 7 for i in lignes]
+    assert valeurs == sorted(valeurs, reverse=True)
+    # Tri stable : à valeur égale, l'ordre du fichier est conservé
+    assert lignes[:3] == [6, 13, 20]
+
+
+def test_recherche_ramene_la_page_dans_les_bornes():
+    app = _ouvrir()
+    app.number_input(key="t:page").set_value(3).run()
+
+    app.text_input(key="t:recherche").input("ligne 00").run()
+    lignes, page = _resultat(app)
+    assert lignes == page == list(range(10))
+    assert app.caption[0].value == "10 ligne(s), page 1 sur 1"
+
+    # Aucun résultat : une seule page, vide
+    app.text_input(key="t:recherche").input("introuvable").run()
+    lignes, page = _resultat(app)
+    assert lignes == page == []
+    assert app.caption[0].value == "0 ligne(s), page 1 sur 1"
+
+
+def test_recherche_vide():
+    """Une recherche vide ou faite d'espaces retient toutes les lignes."""
+    app = _ouvrir()
+    app.text_input(key="t:recherche").input("   ").run()
+    lignes, page = _resultat(app)
+    assert lignes == list(range(120))
+    assert page == list(range(50))
@@ -0,0 +1,66 @@
+import itertools
+
+import pandas as pd
+
+from rhs.actes import table_sejours_actes
+from rhs.sejours import liens_actes
+from rhs.synthetique import ParametresSynthese, generer_lignes
+
+from conftest import SEMAINES_ENTRECOUPEES, fichier, lire
+
+# Format non reconnu : les actes des lignes suivantes reviennent au séjour qui les précède
+TEXTE_LIBRE = (
+    b"12345678 010320242003202401011950 ZZC+045  10040320240101 G819\n"
+    b"ALQ+071  10050320240101\n"
+    b"12345678 010320242003202401011950 PEB+010  10110320240101\n"
+)
+
+
+def test_un_sejour_par_identifiant_et_date_entree():
+    donnees = lire(SEMAINES_ENTRECOUPEES)
+
+    sejours = donnees.sejours
+    assert sejours["id_ligne"].tolist() == [0, 1]
+    assert sejours["date_entree"].tolist() == [pd.Timestamp("2024-03-01"), pd.Timestamp("2024-01-01")]
+    # Seul le dernier RHS du séjour porte la date de sortie
+    assert sejours["date_sortie"].tolist() == [pd.Timestamp("2024-03-06"), pd.Timestamp("2024-01-20")]
+    assert donnees.actes["id_sejour"].tolist() == [0, 1, 0, 0]
+    assert donnees.diagnostics.groupby("id_sejour").size().to_dict() == {0: 5, 1: 2}
+    assert donnees.version_non_reconnue is None
+
+
+def test_actes_de_toutes_les_semaines():
+    donnees = lire(SEMAINES_ENTRECOUPEES)
+
+    liens = liens_actes(donnees.sejours, donnees.actes)
+    sejours_actes = table_sejours_actes(donnees.sejours, donnees.actes)
+
+    assert liens["sejour"].tolist() == [0, 0, 0, 1]
+    assert liens["acte"].tolist() == ["ZZC+045", "ZZC+045", "ALQ+071", "PEB+010"]
+    assert not sejours_actes.duplicated(["sejour", "acte"]).any()
+    assert sejours_actes.set_index("acte")["nb_actes"].to_dict() == {"ALQ+071": 1, "ZZC+045": 2, "PEB+010": 1}
+
+
+def test_expressions_regulieres():
+    donnees = lire(TEXTE_LIBRE)
+
+    assert len(donnees.sejours) == 1
+    assert donnees.sejours["date_sortie"].iloc[0] == pd.Timestamp("2024-03-20")
+    assert donnees.actes["code_csarr"].tolist() == ["ZZC+045", "ALQ+071", "PEB+010"]
+    assert donnees.actes["id_sejour"].tolist() == [0, 0, 0]
+    assert donnees.diagnostics["id_sejour"].tolist() == [0]
+    # Version lue aux positions de celle des formats à positions fixes, signalée à l'import
+    assert donnees.version_non_reconnue == "010"
+
+
+def test_blocs_paralleles_identiques():
+    """Découpé en petits blocs, analysés en parallèle ou non : mêmes tables qu'en une seule fois."""
+    lignes = itertools.islice(generer_lignes(ParametresSynthese(nb_patients=50)), 2000)
+    contenu = fichier(*(ligne.encode("latin-1") for ligne in lignes))
+
+    entier = lire(contenu, processus=1)
+    for processus in (1, 2):
+        par_blocs = lire(contenu, taille_bloc=64 * 1024, processus=processus)
+        for nom in ("sejours", "actes", "diagnostics"):
+            pd.testing.assert_frame_equal(getattr(par_blocs, nom), getattr(entier, nom))
+    assert not entier.sejours.duplicated(["identifiant", "date_entree"]).any()
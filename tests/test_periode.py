@@ -0,0 +1,22 @@
+from datetime import date
+
+from rhs.periode import IndexDates
+from rhs.tables import TablesDerivees
+
+from conftest import SEMAINES_ENTRECOUPEES, lire
+
+
+def test_extraire_periode():
+    """Le séjour de janvier est écarté avec ses actes ; celui de mars garde ceux de ses deux semaines."""
+    index = IndexDates(lire(SEMAINES_ENTRECOUPEES))
+
+    extrait = index.extraire(date(2024, 3, 1), date(2024, 3, 31))
+
+    assert extrait.sejours["date_entree"].dt.month.tolist() == [3]
+    assert extrait.actes["code_csarr"].tolist() == ["ZZC+045", "ZZC+045", "ALQ+071"]
+    assert set(extrait.diagnostics["id_sejour"]) == {0}
+    assert TablesDerivees(extrait).obtenir("sejours_actes")["nb_actes"].sum() == 3
+
+
+def test_bornes():
+    assert IndexDates(lire(SEMAINES_ENTRECOUPEES)).bornes() == (date(2024, 1, 1), date(2024, 3, 6))
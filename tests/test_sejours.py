@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from rhs.sejours import rechercher_sejours
+
+SEJOURS = pd.DataFrame({"identifiant": pd.Categorical(["12345678", "87654321", "Hélène-01", "12349999"])})
+# Actes des séjours 0, 1 et 3 ; le séjour 2 n'en a aucun
+LIENS = pd.DataFrame({
+    "sejour": [0, 0, 1, 3],
+    "acte": pd.Categorical(["ZZC+045", "ALQ+071", "PEB+010", "ZZC+045"]),
+})
+
+
+@pytest.mark.parametrize("texte, trouves", [
+    ("1234", [0, 3]),
+    ("zzc+045", [0, 3]),
+    ("Alq", [0]),
+    # Accents et casse ignorés, dans le texte cherché comme dans les valeurs
+    ("helene", [2]),
+    ("HÉLÈNE", [2]),
+    ("PÉB", [1]),
+    # Pas d'expression régulière : « + » est un caractère comme un autre
+    ("C+0", [0, 3]),
+    ("introuvable", []),
+    ("", [0, 1, 2, 3]),
+])
+def test_rechercher_sejours(texte, trouves):
+    masque = rechercher_sejours(SEJOURS, LIENS, texte)
+
+    assert SEJOURS.index[masque].tolist() == trouves
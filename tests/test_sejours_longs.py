@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rhs.sejours_longs import METHODES, detecter_sejours_longs
+
+# Deux tranches de durées ordinaires d'échelles différentes, chacune avec un séjour aberrant (100 et 500 jours) :
+# 100 jours est aberrant chez les 18-64 ans mais ordinaire chez les 65 ans et plus.
+# S'y ajoutent une hospitalisation en cours (sans durée) et un séjour sans tranche, jamais signalés.
+DUREES = pd.Series(np.r_[np.arange(1, 21), 100, np.arange(81, 101), 500, np.nan, 1000], dtype="float64")
+TRANCHES = pd.Series(pd.Categorical(
+    ["18-64"] * 21 + ["65+"] * 21 + ["65+", None], categories=["0-17", "18-64", "65+"]
+))
+ABERRANTS = {20, 41}
+
+
+# Au 90e percentile par défaut, les séjours ordinaires les plus longs de chaque tranche seraient signalés aussi
+PARAMETRES = {"percentile": 99.0}
+
+
+@pytest.mark.parametrize("methode", METHODES)
+def test_detecter_sejours_longs(methode):
+    parametre = PARAMETRES.get(methode, METHODES[methode].parametre_defaut)
+
+    longs = detecter_sejours_longs(DUREES, TRANCHES, methode, parametre)
+
+    assert longs.dtype == bool
+    assert set(longs[longs].index) == ABERRANTS
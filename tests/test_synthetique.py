@@ -0,0 +1,44 @@
+import itertools
+from datetime import datetime, timedelta
+
+from rhs.formats import FORMAT_M0C
+from rhs.synthetique import ParametresSynthese, generer_lignes
+
+from conftest import fichier, lire
+
+
+def _champ(ligne, nom):
+    debut, longueur = FORMAT_M0C.champs[nom]
+    return ligne[debut:debut + longueur].strip()
+
+
+def _date(texte):
+    return datetime.strptime(texte, "%d%m%Y") if texte else None
+
+
+def test_une_semaine_par_rhs_de_l_entree_a_la_sortie():
+    lignes = list(itertools.islice(generer_lignes(ParametresSynthese(nb_patients=20)), 3000))
+    # Le dernier séjour peut être coupé par la limite du nombre de lignes
+    num_dernier = _champ(lignes[-1], "num_rhs")[:8]
+    sejours = itertools.groupby(
+        (ligne for ligne in lignes if _champ(ligne, "num_rhs")[:8] != num_dernier),
+        key=lambda ligne: _champ(ligne, "num_rhs")[:8],
+    )
+
+    for _, rhs in sejours:
+        rhs = list(rhs)
+        entree, sortie = _date(_champ(rhs[0], "date_entree")), _date(_champ(rhs[0], "date_sortie"))
+        lundis = [_date(_champ(ligne, "date_lundi")) for ligne in rhs]
+        assert lundis[0] <= entree < lundis[0] + timedelta(days=7)
+        assert all(suivant - lundi == timedelta(days=7) for lundi, suivant in zip(lundis, lundis[1:]))
+        if sortie is not None:
+            assert lundis[-1] <= sortie < lundis[-1] + timedelta(days=7)
+        assert all("1" in _champ(ligne, "jours_presence") for ligne in rhs)
+
+
+def test_sejours_du_fichier_genere():
+    lignes = itertools.islice(generer_lignes(ParametresSynthese(nb_patients=20)), 500)
+    donnees = lire(fichier(*(ligne.encode("latin-1") for ligne in lignes)))
+
+    assert len(donnees.sejours) < 500
+    assert (donnees.actes["id_sejour"] >= 0).all()